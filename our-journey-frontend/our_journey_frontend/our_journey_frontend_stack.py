@@ -40,6 +40,10 @@ class OurJourneyFrontendStack(Stack):
         # Create a unique 8-character suffix from stack metadata
         raw_suffix = f"{self.stack_name}-{self.account}-{time.time()}"
         self.suffix = hashlib.md5(raw_suffix.encode()).hexdigest()[:8]
+
+        # Build every "our-journey-<name>-<suffix>" resource name from one prefix
+        def resource_name(name: str) -> str:
+            return f"our-journey-{name}-{self.suffix}"
         
         # ======================================================================
         # 2. VALIDATE BUILD.ZIP EXISTS
@@ -64,7 +68,7 @@ class OurJourneyFrontendStack(Stack):
         user_pool = cognito.UserPool(
             self,
             "OurJourneyUserPool",
-            user_pool_name=f"our-journey-user-pool-{self.suffix}",
+            user_pool_name=resource_name("user-pool"),
             # Sign-in configuration
             sign_in_aliases=cognito.SignInAliases(
                 email=True,
@@ -148,7 +152,7 @@ class OurJourneyFrontendStack(Stack):
         post_confirmation_role = iam.Role(
             self,
             "PostConfirmationLambdaRole",
-            role_name=f"our-journey-post-confirmation-role-{self.suffix}",
+            role_name=resource_name("post-confirmation-role"),
             assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
             description="Execution role for Post-Confirmation Lambda",
         )
@@ -177,7 +181,7 @@ class OurJourneyFrontendStack(Stack):
         post_confirmation_lambda = _lambda.Function(
             self,
             "PostConfirmationLambda",
-            function_name=f"our-journey-post-confirmation-{self.suffix}",
+            function_name=resource_name("post-confirmation"),
             runtime=_lambda.Runtime.PYTHON_3_12,
             handler="post_confirmation_lambda.lambda_handler",
             code=_lambda.Code.from_asset(
@@ -226,7 +230,7 @@ class OurJourneyFrontendStack(Stack):
         admin_creator_role = iam.Role(
             self,
             "AdminCreatorLambdaRole",
-            role_name=f"our-journey-admin-creator-role-{self.suffix}",
+            role_name=resource_name("admin-creator-role"),
             assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
             description="Role for creating default admin user",
         )
@@ -257,7 +261,7 @@ class OurJourneyFrontendStack(Stack):
         admin_creator_lambda = _lambda.Function(
             self,
             "AdminCreatorLambda",
-            function_name=f"our-journey-admin-creator-{self.suffix}",
+            function_name=resource_name("admin-creator"),
             runtime=_lambda.Runtime.PYTHON_3_12,
             handler="create_admin_user_lambda.lambda_handler",
             code=_lambda.Code.from_asset(
@@ -304,7 +308,7 @@ class OurJourneyFrontendStack(Stack):
             self,
             "OurJourneyAppClient",
             user_pool=user_pool,
-            user_pool_client_name=f"our-journey-app-client-{self.suffix}",
+            user_pool_client_name=resource_name("app-client"),
             # OAuth configuration
             o_auth=cognito.OAuthSettings(
                 flows=cognito.OAuthFlows(
@@ -357,7 +361,7 @@ class OurJourneyFrontendStack(Stack):
         cognito_domain = user_pool.add_domain(
             "OurJourneyCognitoDomain",
             cognito_domain=cognito.CognitoDomainOptions(
-                domain_prefix=f"our-journey-app-{self.suffix}",
+                domain_prefix=resource_name("app"),
             ),
         )
         
@@ -367,7 +371,7 @@ class OurJourneyFrontendStack(Stack):
         frontend_bucket = s3.Bucket(
             self,
             "FrontendStoreBucket",
-            bucket_name=f"our-journey-frontend-store-{self.suffix}",
+            bucket_name=resource_name("frontend-store"),
             removal_policy=RemovalPolicy.DESTROY,
             auto_delete_objects=True,
             versioned=False,
@@ -464,7 +468,7 @@ class OurJourneyFrontendStack(Stack):
         lambda_role = iam.Role(
             self,
             "AmplifyDeploymentLambdaRole",
-            role_name=f"our-journey-amplify-lambda-role-{self.suffix}",
+            role_name=resource_name("amplify-lambda-role"),
             assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
             description="Execution role for Our Journey Amplify deployment Lambda",
         )
@@ -555,7 +559,7 @@ class OurJourneyFrontendStack(Stack):
         amplify_deployment_lambda = _lambda.Function(
             self,
             "AmplifyDeploymentLambda",
-            function_name=f"our-journey-amplify-deployment-{self.suffix}",
+            function_name=resource_name("amplify-deployment"),
             runtime=lambda_runtime,
             handler="lambda_function.lambda_handler",
             code=_lambda.Code.from_asset(lambda_code_path),
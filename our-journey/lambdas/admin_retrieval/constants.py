@@ -1,5 +1,6 @@
 import os
 import logging
+from functools import lru_cache
 
 # ============================================================================
 # LOGGING CONFIGURATION
@@ -10,28 +11,48 @@ import logging
 LOG_LEVEL = logging.INFO  # Change this to control what gets logged
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
 
+_logging_configured = False
+
 def setup_logging():
-    """Configure logging for the entire application"""
+    """Configure logging for the entire application (only the first call has any effect)"""
+    global _logging_configured
+    if _logging_configured:
+        return
     logging.basicConfig(
         level=LOG_LEVEL,
         format=LOG_FORMAT,
-        force=True  # Override any existing configuration
+        force=True  # Override the Lambda runtime's default handler
     )
-
-# Call setup when constants is imported
-setup_logging()
+    _logging_configured = True
 
 # ============================================================================
 # DYNAMODB CONFIGURATION
 # ============================================================================
 
-CONVERSATIONS_TABLE = os.environ.get("CONVERSATIONS_TABLE")
-if not CONVERSATIONS_TABLE:
-    raise ValueError("CONVERSATIONS_TABLE environment variable is required")
+# Table names are read (and validated) on first use rather than at import time
+
+@lru_cache(maxsize=1)
+def get_conversations_table():
+    """Name of the conversations table"""
+    table_name = os.environ.get("CONVERSATIONS_TABLE")
+    if not table_name:
+        raise ValueError("CONVERSATIONS_TABLE environment variable is required")
+    return table_name
 
-FOLLOWUP_TABLE = os.environ.get("FOLLOWUP_TABLE")
-if not FOLLOWUP_TABLE:
-    raise ValueError("FOLLOWUP_TABLE environment variable is required")
+@lru_cache(maxsize=1)
+def get_followup_table():
+    """Name of the follow-up table"""
+    table_name = os.environ.get("FOLLOWUP_TABLE")
+    if not table_name:
+        raise ValueError("FOLLOWUP_TABLE environment variable is required")
+    return table_name
+
+# ============================================================================
+# OBSERVABILITY CONFIGURATION
+# ============================================================================
+
+# Only ask DynamoDB to report consumed capacity when debugging
+RETURN_CONSUMED_CAPACITY = 'TOTAL' if LOG_LEVEL <= logging.DEBUG else 'NONE'
 
 # ============================================================================
 # PAGINATION CONFIGURATION
@@ -43,18 +64,46 @@ DEFAULT_LIMIT = 50
 # Maximum number of items allowed per request
 MAX_LIMIT = 100
 
+# Maximum number of DynamoDB pages read while filling a single request
+MAX_PAGES = 5
+
+# ============================================================================
+# QUERY CACHE CONFIGURATION
+# ============================================================================
+
+# How long (seconds) a cached first-page list result stays valid
+QUERY_CACHE_TTL_SECONDS = 10
+
+# Maximum number of cached list results per container
+QUERY_CACHE_MAX_ENTRIES = 256
+
+# ============================================================================
+# PROJECTION CONFIGURATION
+# ============================================================================
+
+# Attributes returned for list requests with view=summary
+CONVERSATION_SUMMARY_FIELDS = [
+    'id', 'timestamp', 'flag', 'userId', 'county',
+    'lastMessage', 'messageCount', 'categories', 'updatedAt'
+]
+
+FOLLOWUP_SUMMARY_FIELDS = [
+    'id', 'timestamp', 'status', 'priority', 'requestType',
+    'userId', 'county', 'assignedTo', 'updatedAt'
+]
+
 # ============================================================================
 # VALIDATION CONSTANTS
 # ============================================================================
 
 # Valid conversation flag values
-VALID_FLAGS = ['none', 'crisis', 'followup', 'resolved']
+VALID_FLAGS = frozenset(['none', 'crisis', 'followup', 'resolved'])
 
 # Valid follow-up status values
-VALID_STATUSES = ['new', 'in-progress', 'completed']
+VALID_STATUSES = frozenset(['new', 'in-progress', 'completed'])
 
 # Valid priority values
-VALID_PRIORITIES = ['normal', 'urgent']
+VALID_PRIORITIES = frozenset(['normal', 'urgent'])
 
 # Valid request type values
-VALID_REQUEST_TYPES = ['normal', 'crisis']
\ No newline at end of file
+VALID_REQUEST_TYPES = frozenset(['normal', 'crisis'])
\ No newline at end of file
@@ -1,7 +1,6 @@
 import json
 import logging
-import traceback
-import constants  # This configures logging
+import constants
 from utilities import (
     query_conversations,
     get_conversation_by_id,
@@ -13,6 +12,7 @@ from utilities import (
     parse_filters
 )
 
+constants.setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -21,7 +21,7 @@ def lambda_handler(event, context):
     AWS Lambda handler for admin retrieval API.
     Routes requests to appropriate handlers based on HTTP method and path.
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.info("Received event: %s", event)
     
     try:
         # Extract request details
@@ -30,7 +30,7 @@ def lambda_handler(event, context):
         path_parameters = event.get('pathParameters') or {}
         query_params = event.get('queryStringParameters') or {}
         
-        logger.info(f"Method: {http_method}, Path: {path}")
+        logger.info("Method: %s, Path: %s", http_method, path)
         
         # Route to appropriate handler
         if path == '/conversations':
@@ -75,12 +75,12 @@ def lambda_handler(event, context):
             return build_response(404, {"error": "Resource not found"}, error=True)
     
     except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}")
+        logger.error("JSON decode error: %s", e)
         return build_response(400, {"error": "Invalid JSON in request body"}, error=True)
     
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Unexpected error: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Internal server error"}, error=True)
 
 
@@ -99,6 +99,7 @@ def handle_list_conversations(query_params):
     - county: Filter by county
     - limit: Number of items per page (default 50, max 100)
     - startKey: Pagination token from previous response
+    - view: 'summary' to return only list-view attributes
     """
     logger.info("Handling list conversations request")
     
@@ -124,11 +125,15 @@ def handle_list_conversations(query_params):
                     "message": "startKey must be valid JSON"
                 }, error=True)
         
+        # Summary view skips heavy attributes such as the message history
+        projection = constants.CONVERSATION_SUMMARY_FIELDS if query_params.get('view') == 'summary' else None
+        
         # Query conversations
         result = query_conversations(
             filters=filters,
             limit=limit,
-            start_key=start_key
+            start_key=start_key,
+            projection=projection
         )
         
         # Format response
@@ -140,16 +145,16 @@ def handle_list_conversations(query_params):
         if result.get('lastEvaluatedKey'):
             response_body['nextPageKey'] = json.dumps(result['lastEvaluatedKey'])
         
-        logger.info(f"Returning {len(result['items'])} conversations")
+        logger.info("Returning %s conversations", len(result['items']))
         return build_response(200, response_body)
     
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return build_response(400, {"error": str(e)}, error=True)
     
     except Exception as e:
-        logger.error(f"Error listing conversations: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error listing conversations: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Failed to list conversations"}, error=True)
 
 
@@ -158,7 +163,7 @@ def handle_get_conversation(conversation_id):
     Handle GET /conversations/{id}
     Get a specific conversation by ID.
     """
-    logger.info(f"Handling get conversation request: {conversation_id}")
+    logger.info("Handling get conversation request: %s", conversation_id)
     
     try:
         conversation = get_conversation_by_id(conversation_id)
@@ -169,12 +174,12 @@ def handle_get_conversation(conversation_id):
                 "conversationId": conversation_id
             }, error=True)
         
-        logger.info(f"Returning conversation {conversation_id}")
+        logger.info("Returning conversation %s", conversation_id)
         return build_response(200, conversation)
     
     except Exception as e:
-        logger.error(f"Error getting conversation: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error getting conversation: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Failed to get conversation"}, error=True)
 
 
@@ -187,7 +192,7 @@ def handle_update_conversation(conversation_id, body):
     - flag: New flag value (none/crisis/followup/resolved)
     - timestamp: Timestamp of the conversation (required for update)
     """
-    logger.info(f"Handling update conversation request: {conversation_id}")
+    logger.info("Handling update conversation request: %s", conversation_id)
     
     try:
         # Validate required fields
@@ -207,11 +212,10 @@ def handle_update_conversation(conversation_id, body):
             }, error=True)
         
         # Validate flag value
-        valid_flags = ['none', 'crisis', 'followup', 'resolved']
-        if new_flag not in valid_flags:
+        if new_flag not in constants.VALID_FLAGS:
             return build_response(400, {
                 "error": "Invalid flag value",
-                "message": f"Flag must be one of: {', '.join(valid_flags)}"
+                "message": f"Flag must be one of: {', '.join(sorted(constants.VALID_FLAGS))}"
             }, error=True)
         
         # Update conversation
@@ -221,7 +225,7 @@ def handle_update_conversation(conversation_id, body):
             new_flag=new_flag
         )
         
-        logger.info(f"Updated conversation {conversation_id} flag to {new_flag}")
+        logger.info("Updated conversation %s flag to %s", conversation_id, new_flag)
         return build_response(200, {
             "id": conversation_id,
             "timestamp": timestamp,
@@ -230,12 +234,12 @@ def handle_update_conversation(conversation_id, body):
         })
     
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return build_response(400, {"error": str(e)}, error=True)
     
     except Exception as e:
-        logger.error(f"Error updating conversation: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error updating conversation: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Failed to update conversation"}, error=True)
 
 
@@ -254,6 +258,7 @@ def handle_list_followups(query_params):
     - requestType: Filter by request type (normal/crisis)
     - limit: Number of items per page (default 50, max 100)
     - startKey: Pagination token from previous response
+    - view: 'summary' to return only list-view attributes
     """
     logger.info("Handling list follow-ups request")
     
@@ -279,11 +284,15 @@ def handle_list_followups(query_params):
                     "message": "startKey must be valid JSON"
                 }, error=True)
         
+        # Summary view skips heavy attributes such as the message history
+        projection = constants.FOLLOWUP_SUMMARY_FIELDS if query_params.get('view') == 'summary' else None
+        
         # Query follow-ups
         result = query_followups(
             filters=filters,
             limit=limit,
-            start_key=start_key
+            start_key=start_key,
+            projection=projection
         )
         
         # Format response
@@ -295,16 +304,16 @@ def handle_list_followups(query_params):
         if result.get('lastEvaluatedKey'):
             response_body['nextPageKey'] = json.dumps(result['lastEvaluatedKey'])
         
-        logger.info(f"Returning {len(result['items'])} follow-ups")
+        logger.info("Returning %s follow-ups", len(result['items']))
         return build_response(200, response_body)
     
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return build_response(400, {"error": str(e)}, error=True)
     
     except Exception as e:
-        logger.error(f"Error listing follow-ups: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error listing follow-ups: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Failed to list follow-ups"}, error=True)
 
 
@@ -313,7 +322,7 @@ def handle_get_followup(followup_id):
     Handle GET /followups/{id}
     Get a specific follow-up by ID.
     """
-    logger.info(f"Handling get follow-up request: {followup_id}")
+    logger.info("Handling get follow-up request: %s", followup_id)
     
     try:
         followup = get_followup_by_id(followup_id)
@@ -324,12 +333,12 @@ def handle_get_followup(followup_id):
                 "followupId": followup_id
             }, error=True)
         
-        logger.info(f"Returning follow-up {followup_id}")
+        logger.info("Returning follow-up %s", followup_id)
         return build_response(200, followup)
     
     except Exception as e:
-        logger.error(f"Error getting follow-up: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error getting follow-up: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Failed to get follow-up"}, error=True)
 
 
@@ -344,7 +353,7 @@ def handle_update_followup(followup_id, body):
     - assignedTo: Person assigned to handle follow-up [optional]
     - notes: Additional notes [optional]
     """
-    logger.info(f"Handling update follow-up request: {followup_id}")
+    logger.info("Handling update follow-up request: %s", followup_id)
     
     try:
         # Validate required fields
@@ -360,11 +369,10 @@ def handle_update_followup(followup_id, body):
         
         if 'status' in body:
             status = body['status']
-            valid_statuses = ['new', 'in-progress', 'completed']
-            if status not in valid_statuses:
+            if status not in constants.VALID_STATUSES:
                 return build_response(400, {
                     "error": "Invalid status value",
-                    "message": f"Status must be one of: {', '.join(valid_statuses)}"
+                    "message": f"Status must be one of: {', '.join(sorted(constants.VALID_STATUSES))}"
                 }, error=True)
             updates['status'] = status
         
@@ -387,7 +395,13 @@ def handle_update_followup(followup_id, body):
             updates=updates
         )
         
-        logger.info(f"Updated follow-up {followup_id}")
+        if updated is None:
+            return build_response(404, {
+                "error": "Follow-up not found",
+                "followupId": followup_id
+            }, error=True)
+        
+        logger.info("Updated follow-up %s", followup_id)
         return build_response(200, {
             "id": followup_id,
             "timestamp": timestamp,
@@ -396,10 +410,10 @@ def handle_update_followup(followup_id, body):
         })
     
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return build_response(400, {"error": str(e)}, error=True)
     
     except Exception as e:
-        logger.error(f"Error updating follow-up: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error updating follow-up: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         return build_response(500, {"error": "Failed to update follow-up"}, error=True)
\ No newline at end of file
@@ -1,9 +1,12 @@
 import boto3
+import json
 import logging
-import traceback
-from datetime import datetime
+import time
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key, Attr
+from itertools import chain, combinations
+from types import MappingProxyType
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from botocore.config import Config
 import constants
 
 logger = logging.getLogger(__name__)
@@ -13,42 +16,305 @@ logger = logging.getLogger(__name__)
 # HELPER FUNCTIONS FOR JSON SERIALIZATION
 # ============================================================================
 
-def decimal_to_number(obj):
+def decimal_default(obj):
     """
-    Recursively convert Decimal objects to int or float for JSON serialization.
-    DynamoDB returns numbers as Decimal objects which are not JSON serializable.
+    json.dumps fallback that converts Decimal objects to int or float.
+    DynamoDB returns numbers as Decimal objects which are not JSON serializable;
+    handling them here avoids walking the whole response tree up front.
     
     Args:
-        obj: Object to convert (can be dict, list, Decimal, or any other type)
+        obj: Object the json encoder could not serialize
     
     Returns:
-        Object with all Decimal values converted to int or float
+        int or float for Decimal values
     """
-    if isinstance(obj, list):
-        return [decimal_to_number(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: decimal_to_number(value) for key, value in obj.items()}
-    elif isinstance(obj, Decimal):
+    if isinstance(obj, Decimal):
         # Convert to int if it's a whole number, otherwise float
         if obj % 1 == 0:
             return int(obj)
-        else:
-            return float(obj)
-    else:
-        return obj
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def utc_now_iso():
+    """
+    Current UTC time as an ISO 8601 string with microseconds, matching the
+    existing timestamp format without building a datetime object.
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{nanos // 1000:06d}'
+
 
+# Shared client config: keep connections alive and pooled across warm
+# invocations, and back off adaptively when DynamoDB throttles
+dynamodb_config = Config(
+    max_pool_connections=64,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    connect_timeout=1.0,
+    read_timeout=3.0
+)
 
 # Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-conversations_table = dynamodb.Table(constants.CONVERSATIONS_TABLE)
-followup_table = dynamodb.Table(constants.FOLLOWUP_TABLE)
+dynamodb = boto3.resource('dynamodb', config=dynamodb_config)
+conversations_table = dynamodb.Table(constants.get_conversations_table())
+followup_table = dynamodb.Table(constants.get_followup_table())
+
+# Low-level client for the read paths - skips the resource layer's condition
+# builders and per-call expression rewriting
+dynamodb_client = boto3.client('dynamodb', config=dynamodb_config)
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _marshal(item):
+    """Convert a plain dict into DynamoDB attribute-value form."""
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+def _unmarshal(item):
+    """Convert a DynamoDB attribute-value dict into a plain dict."""
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
+
+
+# ============================================================================
+# INDEX DISPATCH
+# ============================================================================
+
+# Filterable attributes backed by a GSI, in priority order: (attribute, index)
+# The most selective indexed filter becomes the key condition, the rest are
+# applied as a FilterExpression on the (much smaller) index partition.
+CONVERSATION_INDEXES = (
+    ('userId', 'UserIdIndex'),
+    ('county', 'CountyIndex'),
+    ('flag', 'FlagIndex'),
+)
+
+FOLLOWUP_INDEXES = (
+    ('status', 'StatusIndex'),
+    ('priority', 'PriorityIndex'),
+    ('requestType', 'RequestTypeIndex'),
+)
+
+# Follow-up fields an admin can update, in UpdateExpression order
+FOLLOWUP_UPDATABLE_FIELDS = ('status', 'assignedTo', 'notes')
+
+# Precomputed equality conditions for every filterable attribute
+FILTER_ATTRIBUTES = ('flag', 'userId', 'county', 'status', 'priority', 'requestType', 'assignedTo')
+EQ_CONDITIONS = {attr: f'#{attr} = :{attr}' for attr in FILTER_ATTRIBUTES}
+
+
+def _build_filter_expression(filters, skip=None):
+    """
+    AND together equality conditions for every filter except `skip`.
+    
+    Args:
+        filters: Dictionary of attribute -> value
+        skip: Attribute already covered by the key condition
+    
+    Returns:
+        tuple: (expression string or None, attribute names, attribute values)
+    """
+    conditions = []
+    names = {}
+    values = {}
+    for attr_name, value in filters.items():
+        if attr_name == skip:
+            continue
+        conditions.append(EQ_CONDITIONS[attr_name])
+        names[f'#{attr_name}'] = attr_name
+        values[f':{attr_name}'] = {'S': value}
+    return (' AND '.join(conditions) or None), names, values
+
+
+def _query_or_scan(table_name, indexes, filters, limit, start_key, projection=None):
+    """
+    Run a GSI query when any filter is indexed, otherwise fall back to a scan.
+    
+    DynamoDB applies Limit before FilterExpression, so a single request can come
+    back short (or empty) while more matches remain. Keep requesting pages until
+    `limit` items are collected, the table is exhausted, or MAX_PAGES is reached.
+    
+    Args:
+        table_name: DynamoDB table name
+        indexes: Tuple of (attribute, index_name) pairs in priority order
+        filters: Dictionary of filter criteria (may be empty or None)
+        limit: Maximum number of items to return
+        start_key: Pagination token from previous query
+        projection: Optional list of attribute names to return
+    
+    Returns:
+        dict: {'Items': [...], 'LastEvaluatedKey': {...} or None}
+    """
+    filters = filters or {}
+    request_kwargs = {
+        'TableName': table_name,
+        'ReturnConsumedCapacity': constants.RETURN_CONSUMED_CAPACITY
+    }
+    
+    # Attribute names are always aliased (status/timestamp are reserved words)
+    names = {}
+    values = {}
+    
+    # Only fetch the requested attributes
+    if projection:
+        request_kwargs['ProjectionExpression'] = ', '.join(f'#{attr}' for attr in projection)
+        names.update({f'#{attr}': attr for attr in projection})
+    
+    request = dynamodb_client.scan
+    for key_attr, index_name in indexes:
+        if key_attr in filters:
+            logger.info("Using %s for %s filter: %s", index_name, key_attr, filters[key_attr])
+            request = dynamodb_client.query
+            request_kwargs['IndexName'] = index_name
+            request_kwargs['KeyConditionExpression'] = EQ_CONDITIONS[key_attr]
+            request_kwargs['ScanIndexForward'] = False  # Sort by timestamp descending (newest first)
+            names[f'#{key_attr}'] = key_attr
+            values[f':{key_attr}'] = {'S': filters[key_attr]}
+            filter_expr, filter_names, filter_values = _build_filter_expression(filters, skip=key_attr)
+            break
+    else:
+        # No indexed filter available - scan, applying any remaining filters
+        filter_expr, filter_names, filter_values = _build_filter_expression(filters)
+        if filter_expr is not None:
+            logger.warning("No index covers filters %s, falling back to scan", filters)
+    
+    if filter_expr is not None:
+        request_kwargs['FilterExpression'] = filter_expr
+        names.update(filter_names)
+        values.update(filter_values)
+    
+    if names:
+        request_kwargs['ExpressionAttributeNames'] = names
+    if values:
+        request_kwargs['ExpressionAttributeValues'] = values
+    
+    items = []
+    last_evaluated_key = _marshal(start_key) if start_key else None
+    pages = 0
+    
+    while True:
+        page_kwargs = dict(request_kwargs, Limit=limit - len(items))
+        
+        # Add pagination token if provided
+        if last_evaluated_key:
+            page_kwargs['ExclusiveStartKey'] = last_evaluated_key
+        
+        response = request(**page_kwargs)
+        if 'ConsumedCapacity' in response:
+            logger.debug("Consumed capacity: %s", response['ConsumedCapacity'])
+        items.extend(_unmarshal(item) for item in response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        pages += 1
+        
+        if len(items) >= limit or not last_evaluated_key or pages >= constants.MAX_PAGES:
+            break
+    
+    return {
+        'Items': items,
+        'LastEvaluatedKey': _unmarshal(last_evaluated_key) if last_evaluated_key else None
+    }
+
+
+# ============================================================================
+# QUERY RESULT CACHE
+# ============================================================================
+
+# First-page list results, keyed on the normalized request. Lives for the
+# lifetime of the warm container; entries expire after QUERY_CACHE_TTL_SECONDS
+# and the whole cache is invalidated by bumping the generation on any write.
+_query_cache = {}
+_cache_generation = 0
+
+
+def invalidate_query_cache():
+    """Invalidate all cached list results after a write."""
+    global _cache_generation
+    _cache_generation += 1
+    _query_cache.clear()
+
+
+def _cached_query_or_scan(table_name, indexes, filters, limit, start_key, projection=None):
+    """
+    Serve repeated first-page list requests from the in-process cache.
+    Later pages (start_key set) always go to DynamoDB.
+    
+    Args:
+        Same as _query_or_scan
+    
+    Returns:
+        dict: {'Items': [...], 'LastEvaluatedKey': {...} or None}
+    """
+    if start_key:
+        return _query_or_scan(table_name, indexes, filters, limit, start_key, projection)
+    
+    cache_key = (
+        table_name,
+        tuple(sorted((filters or {}).items())),
+        limit,
+        tuple(projection) if projection else None,
+        _cache_generation
+    )
+    
+    now = time.monotonic()
+    cached = _query_cache.get(cache_key)
+    if cached and cached[0] > now:
+        logger.info("Serving list request from query cache")
+        return cached[1]
+    
+    response = _query_or_scan(table_name, indexes, filters, limit, start_key, projection)
+    
+    # Evict the oldest entry once full (dicts keep insertion order)
+    if len(_query_cache) >= constants.QUERY_CACHE_MAX_ENTRIES:
+        _query_cache.pop(next(iter(_query_cache)))
+    _query_cache[cache_key] = (now + constants.QUERY_CACHE_TTL_SECONDS, response)
+    
+    return response
+
+
+def _get_latest_or_version(table_name, item_id, timestamp=None):
+    """
+    Fetch a specific version of an item, or the newest one when no timestamp is given.
+    
+    Args:
+        table_name: DynamoDB table name
+        item_id: Partition key value
+        timestamp: Optional timestamp (sort key)
+    
+    Returns:
+        dict: Item or None if not found
+    """
+    if timestamp:
+        # Get specific version with both keys
+        response = dynamodb_client.get_item(
+            TableName=table_name,
+            Key={
+                'id': {'S': item_id},
+                'timestamp': {'S': timestamp}
+            }
+        )
+        item = response.get('Item')
+    else:
+        # Query to get latest version (most recent timestamp)
+        response = dynamodb_client.query(
+            TableName=table_name,
+            KeyConditionExpression='#id = :id',
+            ExpressionAttributeNames={'#id': 'id'},
+            ExpressionAttributeValues={':id': {'S': item_id}},
+            ScanIndexForward=False,  # Sort descending (newest first)
+            Limit=1
+        )
+        items = response.get('Items', [])
+        item = items[0] if items else None
+    
+    return _unmarshal(item) if item else None
 
 
 # ============================================================================
 # CONVERSATION QUERIES
 # ============================================================================
 
-def query_conversations(filters=None, limit=50, start_key=None):
+def query_conversations(filters=None, limit=50, start_key=None, projection=None):
     """
     Query conversations table with optional filters and pagination.
     
@@ -56,62 +322,27 @@ def query_conversations(filters=None, limit=50, start_key=None):
         filters: Dictionary of filter criteria (flag, userId, county)
         limit: Maximum number of items to return
         start_key: Pagination token from previous query
+        projection: Optional list of attribute names to return (default: all)
     
     Returns:
         dict: {items: [...], lastEvaluatedKey: {...} or None}
     """
-    logger.info(f"Querying conversations with filters: {filters}, limit: {limit}")
+    logger.info("Querying conversations with filters: %s, limit: %s", filters, limit)
     
     try:
-        scan_kwargs = {
-            'Limit': limit
-        }
-        
-        # Add pagination token if provided
-        if start_key:
-            scan_kwargs['ExclusiveStartKey'] = start_key
-        
-        # Build filter expression if filters provided
-        if filters:
-            filter_expressions = []
-            
-            # Use GSI for flag filter if it's the only/primary filter
-            if 'flag' in filters and len(filters) == 1:
-                logger.info(f"Using FlagIndex for flag filter: {filters['flag']}")
-                response = conversations_table.query(
-                    IndexName='FlagIndex',
-                    KeyConditionExpression=Key('flag').eq(filters['flag']),
-                    Limit=limit,
-                    ScanIndexForward=False,  # Sort by timestamp descending (newest first)
-                    **({'ExclusiveStartKey': start_key} if start_key else {})
-                )
-            else:
-                # Use scan with filter expressions for multiple filters or non-indexed filters
-                if 'flag' in filters:
-                    filter_expressions.append(Attr('flag').eq(filters['flag']))
-                
-                if 'userId' in filters:
-                    filter_expressions.append(Attr('userId').eq(filters['userId']))
-                
-                if 'county' in filters:
-                    filter_expressions.append(Attr('county').eq(filters['county']))
-                
-                # Combine filter expressions with AND
-                if filter_expressions:
-                    filter_expr = filter_expressions[0]
-                    for expr in filter_expressions[1:]:
-                        filter_expr = filter_expr & expr
-                    scan_kwargs['FilterExpression'] = filter_expr
-                
-                response = conversations_table.scan(**scan_kwargs)
-        else:
-            # No filters - scan all
-            response = conversations_table.scan(**scan_kwargs)
+        response = _cached_query_or_scan(
+            constants.get_conversations_table(),
+            CONVERSATION_INDEXES,
+            filters,
+            limit,
+            start_key,
+            projection
+        )
         
         items = response.get('Items', [])
         last_evaluated_key = response.get('LastEvaluatedKey')
         
-        logger.info(f"Retrieved {len(items)} conversations")
+        logger.info("Retrieved %s conversations", len(items))
         
         return {
             'items': items,
@@ -119,8 +350,8 @@ def query_conversations(filters=None, limit=50, start_key=None):
         }
     
     except Exception as e:
-        logger.error(f"Failed to query conversations: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to query conversations: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         raise
 
 
@@ -137,42 +368,25 @@ def get_conversation_by_id(conversation_id, timestamp=None):
     Returns:
         dict: Conversation object or None if not found
     """
-    logger.info(f"Getting conversation: {conversation_id}, timestamp: {timestamp}")
+    logger.info("Getting conversation: %s, timestamp: %s", conversation_id, timestamp)
     
     try:
-        if timestamp:
-            # Get specific version with both keys
-            response = conversations_table.get_item(
-                Key={
-                    'id': conversation_id,
-                    'timestamp': timestamp
-                }
-            )
-            item = response.get('Item')
-        else:
-            # Query to get latest version (most recent timestamp)
-            response = conversations_table.query(
-                KeyConditionExpression=Key('id').eq(conversation_id),
-                ScanIndexForward=False,  # Sort descending (newest first)
-                Limit=1
-            )
-            items = response.get('Items', [])
-            item = items[0] if items else None
+        item = _get_latest_or_version(constants.get_conversations_table(), conversation_id, timestamp)
         
         if item:
-            logger.info(f"Found conversation {conversation_id}")
+            logger.info("Found conversation %s", conversation_id)
         else:
-            logger.warning(f"Conversation {conversation_id} not found")
+            logger.warning("Conversation %s not found", conversation_id)
         
         return item
     
     except Exception as e:
-        logger.error(f"Failed to get conversation: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to get conversation: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         raise
 
 
-def update_conversation_flag(conversation_id, timestamp, new_flag):
+def update_conversation_flag(conversation_id, timestamp, new_flag, return_full=False):
     """
     Update the flag status of a conversation.
     
@@ -180,17 +394,20 @@ def update_conversation_flag(conversation_id, timestamp, new_flag):
         conversation_id: Conversation identifier
         timestamp: Timestamp of the conversation (sort key)
         new_flag: New flag value (none/crisis/followup/resolved)
+        return_full: Return the full updated item (including messages) from
+                     DynamoDB instead of just the updated fields
     
     Returns:
-        dict: Updated conversation item
+        dict: Updated conversation item (or updated fields)
     """
-    logger.info(f"Updating conversation {conversation_id} flag to {new_flag}")
+    logger.info("Updating conversation %s flag to %s", conversation_id, new_flag)
     
     try:
         # Validate flag value
         if new_flag not in constants.VALID_FLAGS:
             raise ValueError(f"Invalid flag value: {new_flag}")
         
+        updated_at = utc_now_iso()
         response = conversations_table.update_item(
             Key={
                 'id': conversation_id,
@@ -199,19 +416,27 @@ def update_conversation_flag(conversation_id, timestamp, new_flag):
             UpdateExpression='SET flag = :flag, updatedAt = :updated',
             ExpressionAttributeValues={
                 ':flag': new_flag,
-                ':updated': datetime.utcnow().isoformat()
+                ':updated': updated_at
             },
-            ReturnValues='ALL_NEW'
+            ReturnValues='ALL_NEW' if return_full else 'NONE'
         )
         
-        updated_item = response.get('Attributes')
-        logger.info(f"Conversation flag updated successfully")
+        invalidate_query_cache()
+        logger.info("Conversation flag updated successfully")
+        
+        if return_full:
+            return response.get('Attributes')
         
-        return updated_item
+        return {
+            'id': conversation_id,
+            'timestamp': timestamp,
+            'flag': new_flag,
+            'updatedAt': updated_at
+        }
     
     except Exception as e:
-        logger.error(f"Failed to update conversation flag: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to update conversation flag: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         raise
 
 
@@ -219,91 +444,35 @@ def update_conversation_flag(conversation_id, timestamp, new_flag):
 # FOLLOW-UP QUERIES
 # ============================================================================
 
-def query_followups(filters=None, limit=50, start_key=None):
+def query_followups(filters=None, limit=50, start_key=None, projection=None):
     """
     Query follow-ups table with optional filters and pagination.
     
     Args:
-        filters: Dictionary of filter criteria (status, priority, requestType)
+        filters: Dictionary of filter criteria (status, priority, requestType, assignedTo)
         limit: Maximum number of items to return
         start_key: Pagination token from previous query
+        projection: Optional list of attribute names to return (default: all)
     
     Returns:
         dict: {items: [...], lastEvaluatedKey: {...} or None}
     """
-    logger.info(f"Querying follow-ups with filters: {filters}, limit: {limit}")
+    logger.info("Querying follow-ups with filters: %s, limit: %s", filters, limit)
     
     try:
-        scan_kwargs = {
-            'Limit': limit
-        }
-        
-        # Add pagination token if provided
-        if start_key:
-            scan_kwargs['ExclusiveStartKey'] = start_key
-        
-        # Build filter expression if filters provided
-        if filters:
-            # Determine if we can use a GSI
-            if 'status' in filters and len(filters) == 1:
-                logger.info(f"Using StatusIndex for status filter: {filters['status']}")
-                response = followup_table.query(
-                    IndexName='StatusIndex',
-                    KeyConditionExpression=Key('status').eq(filters['status']),
-                    Limit=limit,
-                    ScanIndexForward=False,  # Sort by timestamp descending (newest first)
-                    **({'ExclusiveStartKey': start_key} if start_key else {})
-                )
-            elif 'priority' in filters and len(filters) == 1:
-                logger.info(f"Using PriorityIndex for priority filter: {filters['priority']}")
-                response = followup_table.query(
-                    IndexName='PriorityIndex',
-                    KeyConditionExpression=Key('priority').eq(filters['priority']),
-                    Limit=limit,
-                    ScanIndexForward=False,  # Sort by timestamp descending (newest first)
-                    **({'ExclusiveStartKey': start_key} if start_key else {})
-                )
-            elif 'requestType' in filters and len(filters) == 1:
-                logger.info(f"Using RequestTypeIndex for requestType filter: {filters['requestType']}")
-                response = followup_table.query(
-                    IndexName='RequestTypeIndex',
-                    KeyConditionExpression=Key('requestType').eq(filters['requestType']),
-                    Limit=limit,
-                    ScanIndexForward=False,  # Sort by timestamp descending (newest first)
-                    **({'ExclusiveStartKey': start_key} if start_key else {})
-                )
-            else:
-                # Multiple filters or non-indexed filters - use scan
-                filter_expressions = []
-                
-                if 'status' in filters:
-                    filter_expressions.append(Attr('status').eq(filters['status']))
-                
-                if 'priority' in filters:
-                    filter_expressions.append(Attr('priority').eq(filters['priority']))
-                
-                if 'requestType' in filters:
-                    filter_expressions.append(Attr('requestType').eq(filters['requestType']))
-                
-                if 'assignedTo' in filters:
-                    filter_expressions.append(Attr('assignedTo').eq(filters['assignedTo']))
-                
-                # Combine filter expressions with AND
-                if filter_expressions:
-                    filter_expr = filter_expressions[0]
-                    for expr in filter_expressions[1:]:
-                        filter_expr = filter_expr & expr
-                    scan_kwargs['FilterExpression'] = filter_expr
-                
-                response = followup_table.scan(**scan_kwargs)
-        else:
-            # No filters - scan all
-            response = followup_table.scan(**scan_kwargs)
+        response = _cached_query_or_scan(
+            constants.get_followup_table(),
+            FOLLOWUP_INDEXES,
+            filters,
+            limit,
+            start_key,
+            projection
+        )
         
         items = response.get('Items', [])
         last_evaluated_key = response.get('LastEvaluatedKey')
         
-        logger.info(f"Retrieved {len(items)} follow-ups")
+        logger.info("Retrieved %s follow-ups", len(items))
         
         return {
             'items': items,
@@ -311,8 +480,8 @@ def query_followups(filters=None, limit=50, start_key=None):
         }
     
     except Exception as e:
-        logger.error(f"Failed to query follow-ups: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to query follow-ups: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         raise
 
 
@@ -329,114 +498,122 @@ def get_followup_by_id(followup_id, timestamp=None):
     Returns:
         dict: Follow-up object or None if not found
     """
-    logger.info(f"Getting follow-up: {followup_id}, timestamp: {timestamp}")
+    logger.info("Getting follow-up: %s, timestamp: %s", followup_id, timestamp)
     
     try:
-        if timestamp:
-            # Get specific version with both keys
-            response = followup_table.get_item(
-                Key={
-                    'id': followup_id,
-                    'timestamp': timestamp
-                }
-            )
-            item = response.get('Item')
-        else:
-            # Query to get latest version (most recent timestamp)
-            response = followup_table.query(
-                KeyConditionExpression=Key('id').eq(followup_id),
-                ScanIndexForward=False,  # Sort descending (newest first)
-                Limit=1
-            )
-            items = response.get('Items', [])
-            item = items[0] if items else None
+        item = _get_latest_or_version(constants.get_followup_table(), followup_id, timestamp)
         
         if item:
-            logger.info(f"Found follow-up {followup_id}")
+            logger.info("Found follow-up %s", followup_id)
         else:
-            logger.warning(f"Follow-up {followup_id} not found")
+            logger.warning("Follow-up %s not found", followup_id)
         
         return item
     
     except Exception as e:
-        logger.error(f"Failed to get follow-up: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to get follow-up: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         raise
 
 
-def update_followup(followup_id, timestamp, updates):
+def _build_followup_update_template(fields):
+    """
+    Build the UpdateExpression and attribute names for a set of updated fields.
+    
+    Args:
+        fields: frozenset of field names being updated (status, assignedTo, notes)
+    
+    Returns:
+        tuple: (update_expression, expression_names)
+    """
+    # Always update the updatedAt timestamp
+    update_parts = ['updatedAt = :updated']
+    expression_names = {'#id': 'id'}
+    
+    for field in FOLLOWUP_UPDATABLE_FIELDS:
+        if field in fields:
+            update_parts.append(f'#{field} = :{field}')
+            expression_names[f'#{field}'] = field  # 'status' is a reserved word
+    
+    return 'SET ' + ', '.join(update_parts), expression_names
+
+
+# (UpdateExpression, ExpressionAttributeNames) for every combination of updatable fields
+FOLLOWUP_UPDATE_TEMPLATES = {
+    frozenset(fields): _build_followup_update_template(frozenset(fields))
+    for fields in chain.from_iterable(
+        combinations(FOLLOWUP_UPDATABLE_FIELDS, size)
+        for size in range(len(FOLLOWUP_UPDATABLE_FIELDS) + 1)
+    )
+}
+
+
+def update_followup(followup_id, timestamp, updates, return_full=False):
     """
     Update a follow-up's status, assignment, or notes.
+    The update only applies to an existing follow-up; it never creates one.
     
     Args:
         followup_id: Follow-up identifier
         timestamp: Timestamp of the follow-up (sort key)
         updates: Dictionary of fields to update (status, assignedTo, notes)
+        return_full: Return the full updated item from DynamoDB instead of
+                     just the updated fields
     
     Returns:
-        dict: Updated follow-up item
+        dict: Updated follow-up item (or updated fields), None if not found
     """
-    logger.info(f"Updating follow-up {followup_id} with updates: {updates}")
+    logger.info("Updating follow-up %s with updates: %s", followup_id, updates)
     
     try:
         # Validate status if provided
         if 'status' in updates and updates['status'] not in constants.VALID_STATUSES:
             raise ValueError(f"Invalid status value: {updates['status']}")
         
-        # Build update expression
-        update_parts = []
+        template = FOLLOWUP_UPDATE_TEMPLATES.get(frozenset(updates))
+        if template is None:
+            raise ValueError(f"Unsupported update fields: {', '.join(updates)}")
+        update_expression, expression_names = template
+        
+        updated_at = utc_now_iso()
         expression_values = {
-            ':updated': datetime.utcnow().isoformat()
+            ':updated': updated_at
         }
-        expression_names = {}
-        
-        # Always update the updatedAt timestamp
-        update_parts.append('updatedAt = :updated')
+        for field, value in updates.items():
+            expression_values[f':{field}'] = value
         
-        # Add status update if provided
-        if 'status' in updates:
-            update_parts.append('#status = :status')
-            expression_values[':status'] = updates['status']
-            expression_names['#status'] = 'status'  # 'status' is a reserved word
-        
-        # Add assignedTo update if provided
-        if 'assignedTo' in updates:
-            update_parts.append('assignedTo = :assignedTo')
-            expression_values[':assignedTo'] = updates['assignedTo']
+        try:
+            response = followup_table.update_item(
+                Key={
+                    'id': followup_id,
+                    'timestamp': timestamp
+                },
+                UpdateExpression=update_expression,
+                ConditionExpression='attribute_exists(#id)',
+                ExpressionAttributeNames=expression_names,
+                ExpressionAttributeValues=expression_values,
+                ReturnValues='ALL_NEW' if return_full else 'NONE'
+            )
+        except followup_table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.warning("Follow-up %s not found", followup_id)
+            return None
         
-        # Add notes update if provided
-        if 'notes' in updates:
-            update_parts.append('notes = :notes')
-            expression_values[':notes'] = updates['notes']
+        invalidate_query_cache()
+        logger.info("Follow-up updated successfully")
         
-        # Construct the full update expression
-        update_expression = 'SET ' + ', '.join(update_parts)
+        if return_full:
+            return response.get('Attributes')
         
-        # Prepare update_item parameters
-        update_params = {
-            'Key': {
-                'id': followup_id,
-                'timestamp': timestamp
-            },
-            'UpdateExpression': update_expression,
-            'ExpressionAttributeValues': expression_values,
-            'ReturnValues': 'ALL_NEW'
+        return {
+            'id': followup_id,
+            'timestamp': timestamp,
+            'updatedAt': updated_at,
+            **updates
         }
-        
-        # Add ExpressionAttributeNames only if needed
-        if expression_names:
-            update_params['ExpressionAttributeNames'] = expression_names
-        
-        response = followup_table.update_item(**update_params)
-        
-        updated_item = response.get('Attributes')
-        logger.info(f"Follow-up updated successfully")
-        
-        return updated_item
     
     except Exception as e:
-        logger.error(f"Failed to update follow-up: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to update follow-up: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         raise
 
 
@@ -444,9 +621,34 @@ def update_followup(followup_id, timestamp, updates):
 # HELPER FUNCTIONS
 # ============================================================================
 
+# Filterable query parameters per list type: field -> allowed values (None = any)
+FILTER_SCHEMAS = {
+    'conversation': {
+        'flag': constants.VALID_FLAGS,
+        'userId': None,
+        'county': None,
+    },
+    'followup': {
+        'status': constants.VALID_STATUSES,
+        'priority': constants.VALID_PRIORITIES,
+        'requestType': constants.VALID_REQUEST_TYPES,
+        'assignedTo': None,
+    },
+}
+
+# "Must be one of" suffixes for validation errors, built once at import time
+ALLOWED_VALUES_MESSAGES = {
+    field: f"Must be one of: {', '.join(sorted(valid_values))}"
+    for schema in FILTER_SCHEMAS.values()
+    for field, valid_values in schema.items()
+    if valid_values is not None
+}
+
+
 def parse_filters(query_params, filter_type='conversation'):
     """
     Parse query string parameters into filter dictionary.
+    Parameters that are not filters for this type (limit, startKey, ...) are ignored.
     
     Args:
         query_params: Dictionary of query string parameters
@@ -455,51 +657,33 @@ def parse_filters(query_params, filter_type='conversation'):
     Returns:
         dict: Validated filter dictionary
     """
-    logger.info(f"Parsing filters for {filter_type}: {query_params}")
+    logger.info("Parsing filters for %s: %s", filter_type, query_params)
     
+    schema = FILTER_SCHEMAS.get(filter_type, {})
     filters = {}
     
-    if filter_type == 'conversation':
-        # Parse conversation filters
-        if 'flag' in query_params:
-            flag = query_params['flag']
-            if flag not in constants.VALID_FLAGS:
-                raise ValueError(f"Invalid flag value: {flag}. Must be one of: {', '.join(constants.VALID_FLAGS)}")
-            filters['flag'] = flag
-        
-        if 'userId' in query_params:
-            filters['userId'] = query_params['userId']
-        
-        if 'county' in query_params:
-            filters['county'] = query_params['county']
-    
-    elif filter_type == 'followup':
-        # Parse follow-up filters
-        if 'status' in query_params:
-            status = query_params['status']
-            if status not in constants.VALID_STATUSES:
-                raise ValueError(f"Invalid status value: {status}. Must be one of: {', '.join(constants.VALID_STATUSES)}")
-            filters['status'] = status
-        
-        if 'priority' in query_params:
-            priority = query_params['priority']
-            if priority not in constants.VALID_PRIORITIES:
-                raise ValueError(f"Invalid priority value: {priority}. Must be one of: {', '.join(constants.VALID_PRIORITIES)}")
-            filters['priority'] = priority
-        
-        if 'requestType' in query_params:
-            request_type = query_params['requestType']
-            if request_type not in constants.VALID_REQUEST_TYPES:
-                raise ValueError(f"Invalid requestType value: {request_type}. Must be one of: {', '.join(constants.VALID_REQUEST_TYPES)}")
-            filters['requestType'] = request_type
-        
-        if 'assignedTo' in query_params:
-            filters['assignedTo'] = query_params['assignedTo']
+    for field, value in query_params.items():
+        if field not in schema:
+            continue
+        valid_values = schema[field]
+        if valid_values is not None and value not in valid_values:
+            raise ValueError(f"Invalid {field} value: {value}. {ALLOWED_VALUES_MESSAGES[field]}")
+        filters[field] = value
     
-    logger.info(f"Parsed filters: {filters}")
+    logger.info("Parsed filters: %s", filters)
     return filters
 
 
+# Headers shared by every API response (read-only; copied per response
+# because the Lambda runtime must JSON-serialize the returned dict)
+RESPONSE_HEADERS = MappingProxyType({
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+    'Access-Control-Allow-Methods': 'GET,PUT,OPTIONS'
+})
+
+
 def build_response(status_code, body, error=False):
     """
     Build a properly formatted HTTP response for API Gateway.
@@ -512,23 +696,13 @@ def build_response(status_code, body, error=False):
     Returns:
         dict: Formatted HTTP response
     """
-    import json
-    
-    # Convert Decimal objects to JSON-serializable types
-    body = decimal_to_number(body)
-    
     response = {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,PUT,OPTIONS'
-        },
-        'body': json.dumps(body)
+        'headers': dict(RESPONSE_HEADERS),
+        'body': json.dumps(body, default=decimal_default)
     }
     
     if error:
-        logger.warning(f"Error response: {status_code} - {body}")
+        logger.warning("Error response: %s - %s", status_code, body)
     
     return response
\ No newline at end of file
@@ -0,0 +1,28 @@
+import boto3
+from botocore.config import Config
+
+# ============================================================================
+# SHARED AWS SESSION
+# ============================================================================
+
+# One session and client config for every AWS client in this Lambda, so
+# Bedrock, DynamoDB and API Gateway calls all reuse pooled keep-alive
+# connections across warm invocations instead of paying a TLS handshake per call.
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+
+session = boto3.Session()
+
+
+def client(service_name, **kwargs):
+    """Create a low-level client for service_name from the shared session and config"""
+    return session.client(service_name, config=CLIENT_CONFIG, **kwargs)
+
+
+def resource(service_name, **kwargs):
+    """Create a resource for service_name from the shared session and config"""
+    return session.resource(service_name, config=CLIENT_CONFIG, **kwargs)
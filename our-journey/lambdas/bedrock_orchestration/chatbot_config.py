@@ -1,6 +1,6 @@
 import logging
 from prompts import prompt
-import constants  # This configures logging
+import constants
 import random
 import json
 
@@ -26,6 +26,19 @@ temperature = 0.3
 # RETRIEVAL FUNCTIONS
 # ============================================================================
 
+# System blocks shared by every request. Built once so the cached prefix sent
+# to Bedrock is identical on every call; only the block after it changes.
+STATIC_SYSTEM_BLOCKS = (
+    {
+        "text": prompt.static_prompt,
+    },
+    {
+        # Prompt caching: everything above this point is reused across requests
+        "cachePoint": {"type": "default"},
+    },
+)
+
+
 # This function retrieves the appropriate prompt based on the type of interaction.
 def get_prompt(results=None, userInfo=None):
     """
@@ -36,8 +49,9 @@ def get_prompt(results=None, userInfo=None):
     
     try:
         return [
+            *STATIC_SYSTEM_BLOCKS,
             {
-                "text": prompt.prompt.format(results=results, userInfo=json.dumps(userInfo)), 
+                "text": prompt.render(results=results, userInfo=json.dumps(userInfo)),
             }
         ]
         
@@ -1,5 +1,6 @@
 import os
 import logging
+from urllib.parse import urlsplit
 
 # ============================================================================
 # LOGGING CONFIGURATION
@@ -10,16 +11,19 @@ import logging
 LOG_LEVEL = logging.INFO  # Change this to control what gets logged
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
 
+_logging_configured = False
+
 def setup_logging():
-    """Configure logging for the entire application"""
+    """Configure logging for the entire application (only the first call has any effect)"""
+    global _logging_configured
+    if _logging_configured:
+        return
     logging.basicConfig(
         level=LOG_LEVEL,
         format=LOG_FORMAT,
-        force=True  # Override any existing configuration
+        force=True  # Override the Lambda runtime's default handler
     )
-
-# Call setup when constants is imported
-setup_logging()
+    _logging_configured = True
 
 # ============================================================================
 # CONSTANTS CONFIGURATION
@@ -29,6 +33,13 @@ API_GATEWAY_URL = os.environ.get("API_GATEWAY_URL")
 if not API_GATEWAY_URL:
     raise ValueError("API_GATEWAY_URL environment variable is required")
 
+# Responses are posted through the HTTPS management endpoint of the
+# WebSocket API's "prod" stage
+_api_gateway_url = urlsplit(API_GATEWAY_URL)
+if _api_gateway_url.scheme not in ("wss", "https") or not _api_gateway_url.netloc:
+    raise ValueError(f"API_GATEWAY_URL must be a wss:// or https:// URL, got {API_GATEWAY_URL!r}")
+API_GATEWAY_MANAGEMENT_URL = f"https://{_api_gateway_url.netloc}{_api_gateway_url.path.rstrip('/')}/prod"
+
 
 KNOWLEDGE_BASE_ID = os.environ.get("KNOWLEDGE_BASE_ID")
 if not KNOWLEDGE_BASE_ID:
@@ -37,6 +48,7 @@ if not KNOWLEDGE_BASE_ID:
 NUM_KB_RESULTS = os.environ.get("NUM_KB_RESULTS")
 if not NUM_KB_RESULTS:
     raise ValueError("NUM_KB_RESULTS environment variable is required")
+NUM_KB_RESULTS = int(NUM_KB_RESULTS)
 
 GUARDRAIL_ID = os.environ.get("GUARDRAIL_ID")
 if not GUARDRAIL_ID:
@@ -54,6 +66,34 @@ FOLLOWUP_TABLE = os.environ.get("FOLLOWUP_TABLE")
 if not FOLLOWUP_TABLE:
     raise ValueError("FOLLOWUP_TABLE environment variable is required")
 
+# Optional DAX cluster endpoint (e.g. dax://my-cluster.xxxx.dax-clusters.us-east-1.amazonaws.com)
+# When set, DynamoDB reads/writes go through DAX (requires the amazon-dax-client package)
+DAX_ENDPOINT = os.environ.get("DAX_ENDPOINT")
+
+# In-memory cache of latest conversation versions (per warm container)
+CONVERSATION_CACHE_TTL_SECONDS = 30
+CONVERSATION_CACHE_MAX_ENTRIES = 512
+
+# In-memory cache of knowledge base retrievals (per warm container)
+KB_CACHE_TTL_SECONDS = 300
+KB_CACHE_MAX_ENTRIES = 256
+
+# userInfo fields the system prompt personalizes on; everything else
+# (contact details in particular) is kept out of the model context. The
+# response cache segments on the same fields.
+PROMPT_USER_INFO_FIELDS = ('county', 'location', 'releaseDate', 'age18Plus', 'gender', 'language')
+
+# Optional response cache table; the cache is disabled when unset
+RESPONSE_CACHE_TABLE = os.environ.get("RESPONSE_CACHE_TABLE")
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+# In-memory tier in front of the table (per warm container)
+EXACT_CACHE_TTL_SECONDS = 60 * 60
+EXACT_CACHE_MAX_ENTRIES = 2048
+
+# Streamed text is coalesced into one WebSocket frame per batch
+STREAM_BATCH_MAX_CHARS = 512
+STREAM_BATCH_MAX_DELAY_SECONDS = 0.03
+
 GUARDRAILS_CONFIG_STREAMING = {
         'guardrailIdentifier': GUARDRAIL_ID,
         'guardrailVersion': GUARDRAIL_VERSION,
@@ -1,18 +1,78 @@
-import boto3
 import logging
-import traceback
-from datetime import datetime
+import time
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+import hashlib
 import json
+import re
+from collections import OrderedDict
+import aws_clients
 import constants
 
 logger = logging.getLogger(__name__)
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
+
+def utc_now_iso():
+    """
+    Current UTC time as an ISO 8601 string with microseconds, matching the
+    existing timestamp format without building a datetime object.
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{nanos // 1000:06d}'
+
+
+# Initialize DynamoDB client once per container so warm invocations reuse
+# the resource, table handles and pooled keep-alive connections.
+# When a DAX cluster is configured, reads and writes go through DAX instead;
+# the Table API is the same so no call sites change.
+if constants.DAX_ENDPOINT:
+    from amazondax import AmazonDaxClient
+    dynamodb = AmazonDaxClient.resource(endpoint_url=constants.DAX_ENDPOINT)
+    logger.info(f"Using DAX endpoint: {constants.DAX_ENDPOINT}")
+else:
+    dynamodb = aws_clients.resource('dynamodb')
 conversations_table = dynamodb.Table(constants.CONVERSATIONS_TABLE)
 followup_table = dynamodb.Table(constants.FOLLOWUP_TABLE)
+_serializer = TypeSerializer()
+
+
+def _serialize_item(item):
+    """Marshal a Table-style item into the low-level client format"""
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+# ============================================================================
+# LATEST CONVERSATION VERSION CACHE
+# ============================================================================
+
+# conversation_id -> (expires_at, {'timestamp', 'messageCount'}), least
+# recently used first. Only the version is kept, never messages or userInfo.
+# Scoped to the warm container; writers keep it in sync.
+_version_cache = OrderedDict()
+
+
+def _cache_get_version(conversation_id):
+    """Return the cached latest version, or None on a miss or expired entry."""
+    entry = _version_cache.get(conversation_id)
+    if entry is None:
+        return None
+    expires_at, version = entry
+    if expires_at < time.monotonic():
+        del _version_cache[conversation_id]
+        return None
+    _version_cache.move_to_end(conversation_id)
+    return version
+
+
+def _cache_put_version(conversation_id, timestamp, message_count):
+    """Cache the latest version, evicting the least recently used entry when full."""
+    version = {'timestamp': timestamp, 'messageCount': message_count}
+    _version_cache[conversation_id] = (time.monotonic() + constants.CONVERSATION_CACHE_TTL_SECONDS, version)
+    _version_cache.move_to_end(conversation_id)
+    if len(_version_cache) > constants.CONVERSATION_CACHE_MAX_ENTRIES:
+        _version_cache.popitem(last=False)
 
 
 # ============================================================================
@@ -20,7 +80,8 @@ followup_table = dynamodb.Table(constants.FOLLOWUP_TABLE)
 # ============================================================================
 
 def save_conversation(conversation_id, user_id, county, messages, user_info, 
-                     flag='none', categories=None, last_message='', timestamp=None):
+                     flag='none', categories=None, last_message='', timestamp=None,
+                     followup=None, stored_message_count=None):
     """
     Save or update a conversation in DynamoDB.
     
@@ -34,13 +95,19 @@ def save_conversation(conversation_id, user_id, county, messages, user_info,
         categories: List of conversation categories/topics
         last_message: The most recent message text
         timestamp: Optional timestamp to use (for updates). If not provided, creates new timestamp.
+        followup: Optional _build_followup_item keyword arguments; the follow-up
+            record is then written in the same TransactWriteItems call as the conversation
+        stored_message_count: Number of messages already stored for this
+            timestamp; when given only the new messages are sent and appended
     """
     logger.info(f"Saving conversation: {conversation_id}")
     
     try:
+        now = utc_now_iso()
+        
         # Use provided timestamp or create new one
         if timestamp is None:
-            timestamp = datetime.utcnow().isoformat()
+            timestamp = now
             logger.info(f"Created new timestamp: {timestamp}")
         else:
             logger.info(f"Using existing timestamp: {timestamp}")
@@ -64,51 +131,107 @@ def save_conversation(conversation_id, user_id, county, messages, user_info,
             'flag': flag,
             'messages': messages,  # Full conversation history
             'userInfo': user_info,  # Store complete user info
-            'updatedAt': datetime.utcnow().isoformat()  # Always update this
+            'messagesHash': _messages_hash(messages),  # Lets the next save verify its prefix
+            'updatedAt': now  # Always update this
         }
         
         # Save to DynamoDB
-        conversations_table.put_item(Item=item)
+        followup_item = _build_followup_item(**followup) if followup else None
+        try:
+            _write_conversation(
+                _conversation_write(item, stored_message_count), followup_item
+            )
+        except ClientError as e:
+            # The stored history no longer matches what the client sent
+            # (e.g. a missed save); fall back to rewriting the whole item
+            if stored_message_count is None or e.response['Error']['Code'] not in (
+                    'ConditionalCheckFailedException', 'TransactionCanceledException'):
+                raise
+            logger.warning(f"Stored history for {conversation_id} diverged, rewriting conversation")
+            _write_conversation(_conversation_write(item, None), followup_item)
+        
+        if followup_item:
+            logger.info(f"Follow-up {followup_item['id']} saved with conversation")
+        _cache_put_version(conversation_id, timestamp, message_count)
         
         logger.info(f"Conversation {conversation_id} saved successfully")
         return item
         
     except Exception as e:
-        logger.error(f"Failed to save conversation: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Failed to save conversation: %s", e)
         raise
 
 
-def update_conversation_flag(conversation_id, timestamp, new_flag):
+def _messages_hash(messages):
+    """Stable digest of a message list, used to check a stored prefix before appending"""
+    encoded = json.dumps(messages, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _conversation_write(item, stored_message_count):
     """
-    Update the flag status of a conversation.
+    Build the low-level write for a conversation item.
     
-    Args:
-        conversation_id: Unique identifier for the conversation
-        timestamp: Timestamp of the conversation (sort key)
-        new_flag: New flag value (none/crisis/followup/resolved)
+    When the request added exactly one user and one assistant message to the
+    stored_message_count messages already stored, only those two are sent and
+    appended with list_append. The append is conditional on the stored
+    messagesHash matching the hash of the client's first stored_message_count
+    messages, so history the client sends in a different shape (e.g. an
+    answer split into several bubbles) is never appended to. Otherwise the
+    whole item is put.
+    
+    Returns:
+        tuple: ('Put' or 'Update', request parameters)
     """
-    logger.info(f"Updating conversation {conversation_id} flag to {new_flag}")
+    messages = item['messages']
+    if not stored_message_count or len(messages) != stored_message_count + 2:
+        return 'Put', {
+            'TableName': constants.CONVERSATIONS_TABLE,
+            'Item': _serialize_item(item)
+        }
     
-    try:
-        conversations_table.update_item(
-            Key={
-                'id': conversation_id,
-                'timestamp': timestamp
-            },
-            UpdateExpression='SET flag = :flag, updatedAt = :updated',
-            ExpressionAttributeValues={
-                ':flag': new_flag,
-                ':updated': datetime.utcnow().isoformat()
-            }
+    fields = {key: value for key, value in item.items() if key not in ('id', 'timestamp', 'messages')}
+    names = {f'#{key}': key for key in fields}
+    names['#messages'] = 'messages'
+    values = {f':{key}': value for key, value in fields.items()}
+    values[':newMessages'] = messages[stored_message_count:]
+    values[':storedHash'] = _messages_hash(messages[:stored_message_count])
+    
+    return 'Update', {
+        'TableName': constants.CONVERSATIONS_TABLE,
+        'Key': _serialize_item({'id': item['id'], 'timestamp': item['timestamp']}),
+        'UpdateExpression': 'SET ' + ', '.join(f'#{key} = :{key}' for key in fields)
+                            + ', #messages = list_append(#messages, :newMessages)',
+        'ConditionExpression': '#messagesHash = :storedHash',
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': _serialize_item(values)
+    }
+
+
+def _write_conversation(conversation_write, followup_item=None):
+    """
+    Execute a conversation write from _conversation_write, in one transaction
+    with the follow-up record when there is one.
+    """
+    action, params = conversation_write
+    client = dynamodb.meta.client
+    
+    if followup_item:
+        client.transact_write_items(
+            TransactItems=[
+                {action: params},
+                {
+                    'Put': {
+                        'TableName': constants.FOLLOWUP_TABLE,
+                        'Item': _serialize_item(followup_item)
+                    }
+                }
+            ]
         )
-        
-        logger.info(f"Conversation flag updated successfully")
-        
-    except Exception as e:
-        logger.error(f"Failed to update conversation flag: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
-        raise
+    elif action == 'Put':
+        client.put_item(**params)
+    else:
+        client.update_item(**params)
 
 
 def get_conversation(conversation_id, timestamp):
@@ -141,8 +264,7 @@ def get_conversation(conversation_id, timestamp):
         return item
         
     except Exception as e:
-        logger.error(f"Failed to retrieve conversation: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Failed to retrieve conversation: %s", e)
         raise
 
 
@@ -150,11 +272,11 @@ def get_conversation(conversation_id, timestamp):
 # FOLLOW-UP MANAGEMENT
 # ============================================================================
 
-def save_followup(conversation_id, user_id, county, email, phone, 
-                 preferred_contact, conversation_summary, request_type='normal',
-                 priority='normal', status='new'):
+def _build_followup_item(conversation_id, user_id, county, email, phone,
+                         preferred_contact, conversation_summary, request_type,
+                         priority, status):
     """
-    Save a follow-up request to DynamoDB.
+    Build a new follow-up item.
     
     Args:
         conversation_id: Reference to the original conversation
@@ -169,47 +291,35 @@ def save_followup(conversation_id, user_id, county, email, phone,
         status: Workflow status ('new', 'in-progress', 'completed')
     
     Returns:
-        dict: The created follow-up item
+        dict: The follow-up item, ready to be written
     """
-    logger.info(f"Saving follow-up for conversation: {conversation_id}")
+    timestamp = utc_now_iso()
+    followup_id = f"followup_{conversation_id}_{timestamp}"
+    
+    # Prepare the item
+    item = {
+        'id': followup_id,
+        'timestamp': timestamp,
+        'conversationId': conversation_id,
+        'userId': user_id,
+        'county': county,
+        'status': status,
+        'priority': priority,
+        'requestType': request_type,
+        'conversationSummary': conversation_summary,
+        'createdAt': timestamp,
+        'updatedAt': timestamp
+    }
     
-    try:
-        timestamp = datetime.utcnow().isoformat()
-        followup_id = f"followup_{conversation_id}_{timestamp}"
-        
-        # Prepare the item
-        item = {
-            'id': followup_id,
-            'timestamp': timestamp,
-            'conversationId': conversation_id,
-            'userId': user_id,
-            'county': county,
-            'status': status,
-            'priority': priority,
-            'requestType': request_type,
-            'conversationSummary': conversation_summary,
-            'createdAt': timestamp,
-            'updatedAt': timestamp
-        }
-        
-        # Add contact info if provided
-        if email:
-            item['email'] = email
-        if phone:
-            item['phone'] = phone
-        if preferred_contact:
-            item['preferredContact'] = preferred_contact
-        
-        # Save to DynamoDB
-        followup_table.put_item(Item=item)
-        
-        logger.info(f"Follow-up {followup_id} saved successfully")
-        return item
-        
-    except Exception as e:
-        logger.error(f"Failed to save follow-up: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
-        raise
+    # Add contact info if provided
+    if email:
+        item['email'] = email
+    if phone:
+        item['phone'] = phone
+    if preferred_contact:
+        item['preferredContact'] = preferred_contact
+    
+    return item
 
 
 def update_followup_status(followup_id, timestamp, new_status, assignee=None, notes=None):
@@ -229,7 +339,7 @@ def update_followup_status(followup_id, timestamp, new_status, assignee=None, no
         update_expression = 'SET #status = :status, updatedAt = :updated'
         expression_values = {
             ':status': new_status,
-            ':updated': datetime.utcnow().isoformat()
+            ':updated': utc_now_iso()
         }
         expression_names = {
             '#status': 'status'  # 'status' is a reserved word in DynamoDB
@@ -258,8 +368,7 @@ def update_followup_status(followup_id, timestamp, new_status, assignee=None, no
         logger.info(f"Follow-up status updated successfully")
         
     except Exception as e:
-        logger.error(f"Failed to update follow-up status: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Failed to update follow-up status: %s", e)
         raise
 
 
@@ -293,8 +402,7 @@ def get_followup(followup_id, timestamp):
         return item
         
     except Exception as e:
-        logger.error(f"Failed to retrieve follow-up: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Failed to retrieve follow-up: %s", e)
         raise
 
 
@@ -302,6 +410,10 @@ def get_followup(followup_id, timestamp):
 # HELPER FUNCTIONS
 # ============================================================================
 
+# Spaces become underscores and commas are dropped when a location is used in an ID
+_LOCATION_ID_TRANSLATION = str.maketrans({' ': '_', ',': None})
+
+
 def extract_user_id(user_info):
     """
     Extract or generate a user ID from userInfo.
@@ -319,8 +431,8 @@ def extract_user_id(user_info):
         return user_info['phone']
     else:
         # Generate a unique ID based on location and timestamp
-        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        location = user_info.get('location', 'unknown').replace(' ', '_').replace(',', '')
+        timestamp = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        location = user_info.get('location', 'unknown').translate(_LOCATION_ID_TRANSLATION)
         return f"user_{location}_{timestamp}"
 
 
@@ -335,12 +447,59 @@ def extract_county(user_info):
         str: County name or 'Unknown'
     """
     location = user_info.get('location', '')
-    if ',' in location:
-        # Format is typically "Durham, NC" so take the first part
-        return location.split(',')[0].strip()
+    # Format is typically "Durham, NC" so take the first part
+    county, sep, _ = location.partition(',')
+    if sep:
+        return county.strip()
     return location if location else 'Unknown'
 
 
+# Keywords to look for in messages
+CATEGORY_KEYWORDS = {
+    'housing': ['housing', 'apartment', 'shelter', 'home', 'rent'],
+    'employment': ['job', 'employment', 'work', 'career', 'interview'],
+    'legal': ['legal', 'lawyer', 'court', 'attorney', 'law'],
+    'health': ['health', 'medical', 'doctor', 'hospital', 'clinic'],
+    'education': ['education', 'school', 'college', 'training', 'class'],
+    'transportation': ['transportation', 'bus', 'ride', 'car', 'travel'],
+    'family': ['family', 'children', 'kids', 'parent', 'child'],
+    'financial': ['money', 'financial', 'budget', 'debt', 'income']
+}
+
+
+def _build_keyword_scanner(category_keywords):
+    """
+    Compile all category keywords into a single pattern that is scanned once
+    over the text, instead of one substring search per keyword.
+    
+    The lookahead reports the longest keyword starting at each position, so
+    every keyword found there is a prefix of it ('car' inside 'career');
+    each keyword therefore maps to the categories of all its prefixes.
+    """
+    keywords = {kw for kws in category_keywords.values() for kw in kws}
+    keyword_categories = {
+        kw: frozenset(
+            category
+            for category, kws in category_keywords.items()
+            if any(kw.startswith(other) for other in kws)
+        )
+        for kw in keywords
+    }
+    alternation = '|'.join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+    return re.compile(f'(?=({alternation}))'), keyword_categories
+
+
+_KEYWORD_PATTERN, _KEYWORD_CATEGORIES = _build_keyword_scanner(CATEGORY_KEYWORDS)
+
+
+def _message_text(msg):
+    """Return the text of a message whose content is a string or a list of blocks."""
+    content = msg.get('content', '')
+    if isinstance(content, list):
+        return content[0].get('text', '') if content else ''
+    return content if isinstance(content, str) else ''
+
+
 def extract_categories(messages):
     """
     Extract conversation categories/topics from messages.
@@ -352,33 +511,18 @@ def extract_categories(messages):
     Returns:
         list: List of category strings
     """
-    categories = []
-    
-    # Keywords to look for in messages
-    category_keywords = {
-        'housing': ['housing', 'apartment', 'shelter', 'home', 'rent'],
-        'employment': ['job', 'employment', 'work', 'career', 'interview'],
-        'legal': ['legal', 'lawyer', 'court', 'attorney', 'law'],
-        'health': ['health', 'medical', 'doctor', 'hospital', 'clinic'],
-        'education': ['education', 'school', 'college', 'training', 'class'],
-        'transportation': ['transportation', 'bus', 'ride', 'car', 'travel'],
-        'family': ['family', 'children', 'kids', 'parent', 'child'],
-        'financial': ['money', 'financial', 'budget', 'debt', 'income']
-    }
-    
-    # Combine all message content
-    all_text = ' '.join([
-        msg.get('content', [{}])[0].get('text', '').lower() 
-        if isinstance(msg.get('content'), list) 
-        else msg.get('content', '').lower()
-        for msg in messages
-    ])
-    
-    # Check for keywords
-    for category, keywords in category_keywords.items():
-        if any(keyword in all_text for keyword in keywords):
-            categories.append(category)
-    
+    # Scan one message at a time rather than joining the whole history,
+    # stopping as soon as every category has been seen
+    found = set()
+    for msg in messages:
+        text = _message_text(msg).lower()
+        for match in _KEYWORD_PATTERN.finditer(text):
+            found |= _KEYWORD_CATEGORIES[match.group(1)]
+        if len(found) == len(CATEGORY_KEYWORDS):
+            break
+    
+    # Keep the declaration order of CATEGORY_KEYWORDS
+    categories = [category for category in CATEGORY_KEYWORDS if category in found]
     return categories if categories else ['general']
 
 
@@ -398,53 +542,57 @@ def generate_conversation_summary(messages, max_length=200):
         return "No messages in conversation"
     
     # Find first user message
-    for msg in messages:
-        if msg.get('role') == 'user':
-            content = msg.get('content', [{}])
-            if isinstance(content, list) and content:
-                text = content[0].get('text', '')
-            else:
-                text = str(content)
-            
-            # Truncate if too long
-            if len(text) > max_length:
-                return text[:max_length] + "..."
-            return text
-    
-    return "Conversation summary unavailable"
-
-
-def get_latest_conversation(conversation_id):
+    text = next((_message_text(msg) for msg in messages if msg.get('role') == 'user'), None)
+    if text is None:
+        return "Conversation summary unavailable"
+    
+    # Truncate if too long
+    if len(text) > max_length:
+        return text[:max_length] + "..."
+    return text
+
+
+def get_latest_conversation_version(conversation_id):
     """
-    Get the most recent version of a conversation by ID.
-    Queries DynamoDB to find the latest timestamp for this conversation.
+    Get the timestamp (sort key) and stored message count of the most recent
+    version of a conversation. Served from the in-memory cache when possible;
+    a cache miss only reads these two attributes, not the whole item.
     
     Args:
         conversation_id: Conversation identifier
     
     Returns:
-        dict: Conversation object or None if not found
+        dict: {'timestamp': str, 'messageCount': int} or None if not found
     """
-    logger.info(f"Getting latest conversation: {conversation_id}")
+    logger.info(f"Getting latest conversation version: {conversation_id}")
+    
+    cached = _cache_get_version(conversation_id)
+    if cached is not None:
+        logger.info(f"Latest conversation {conversation_id} served from cache")
+        return dict(cached)
     
     try:
-        # Query to get latest version (most recent timestamp)
         response = conversations_table.query(
             KeyConditionExpression=Key('id').eq(conversation_id),
             ScanIndexForward=False,  # Sort descending (newest first)
-            Limit=1
+            Limit=1,
+            ProjectionExpression='#ts, messageCount',
+            ExpressionAttributeNames={'#ts': 'timestamp'}
         )
         items = response.get('Items', [])
-        item = items[0] if items else None
         
-        if item:
-            logger.info(f"Found latest conversation {conversation_id} with timestamp {item['timestamp']}")
-        else:
+        if not items:
             logger.info(f"No existing conversation found for {conversation_id}")
+            return None
         
-        return item
+        version = {
+            'timestamp': items[0]['timestamp'],
+            'messageCount': int(items[0].get('messageCount', 0))
+        }
+        _cache_put_version(conversation_id, version['timestamp'], version['messageCount'])
+        logger.info(f"Found latest conversation {conversation_id} with timestamp {version['timestamp']}")
+        return version
     
     except Exception as e:
-        logger.error(f"Failed to get latest conversation: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
-        raise
\ No newline at end of file
+        logger.exception("Failed to get latest conversation version: %s", e)
+        raise
@@ -1,17 +1,50 @@
 import json
 import logging
-import traceback
 from utilities import converse_with_model_no_guardrails
 from prompts import followup_prompt
 import dynamodb_utils
+import serialization
 import constants
 
 logger = logging.getLogger(__name__)
 
 # Model configuration for follow-up detection
-FOLLOWUP_MODEL_ID = "us.amazon.nova-pro-v1:0"  # Same model as main chatbot
+FOLLOWUP_MODEL_ID = "us.amazon.nova-lite-v1:0"  # Smaller, faster model for classification
 FOLLOWUP_TEMPERATURE = 0.1  # Lower temperature for more consistent classification
 
+# The model is forced to answer through this tool, so the result comes back
+# as structured input matching the schema instead of free text to be parsed
+FOLLOWUP_TOOL_NAME = "record_followup_decision"
+FOLLOWUP_TOOL_CONFIG = {
+    "tools": [{
+        "toolSpec": {
+            "name": FOLLOWUP_TOOL_NAME,
+            "description": "Record the follow-up triage decision for the user's message.",
+            "inputSchema": {
+                "json": {
+                    "type": "object",
+                    "properties": {
+                        "needs_followup": {"type": "boolean"},
+                        "request_type": {"type": "string", "enum": ["crisis", "normal", "none"]},
+                        "priority": {"type": "string", "enum": ["urgent", "normal"]},
+                        "conversation_flag": {"type": "string", "enum": ["crisis", "followup", "none"]},
+                        "reasoning": {"type": "string"},
+                        "preferred_contact": {"type": ["string", "null"], "enum": ["email", "phone", None]}
+                    },
+                    "required": ["needs_followup", "request_type", "priority", "conversation_flag", "reasoning"]
+                }
+            }
+        }
+    }],
+    "toolChoice": {"tool": {"name": FOLLOWUP_TOOL_NAME}}
+}
+
+# Validation tables for the model's JSON response
+REQUIRED_FIELDS = ("needs_followup", "request_type", "priority", "conversation_flag")
+VALID_REQUEST_TYPES = frozenset(("crisis", "normal", "none"))
+VALID_PRIORITIES = frozenset(("urgent", "normal"))
+VALID_FLAGS = frozenset(("crisis", "followup", "none"))
+
 
 def analyze_for_followup(user_message, user_info, conversation_id):
     """
@@ -35,7 +68,7 @@ def analyze_for_followup(user_message, user_info, conversation_id):
     
     try:
         # Build the prompt
-        formatted_prompt = followup_prompt.prompt.format(
+        formatted_prompt = followup_prompt.render(
             userInfo=json.dumps(user_info, indent=2),
             userMessage=user_message
         )
@@ -52,22 +85,28 @@ def analyze_for_followup(user_message, user_info, conversation_id):
             chatHistory=messages,
             config={"temperature": FOLLOWUP_TEMPERATURE},
             system=None,  # Prompt is in the user message
-            streaming=False
+            streaming=False,
+            tool_config=FOLLOWUP_TOOL_CONFIG
         )
         
-        # Extract the response text
-        response_text = response["output"]["message"]["content"][0]["text"]
-        logger.info(f"Follow-up detection response: {response_text[:200]}...")
+        # Extract the structured tool input, falling back to the response text
+        content = response["output"]["message"]["content"]
+        tool_use = next((block["toolUse"] for block in content if "toolUse" in block), None)
+        if tool_use is not None:
+            raw_result = tool_use["input"]
+            logger.info(f"Follow-up detection tool input: {raw_result}")
+        else:
+            raw_result = next(block["text"] for block in content if "text" in block)
+            logger.info(f"Follow-up detection response: {raw_result[:200]}...")
         
         # Parse and validate the JSON
-        followup_result = parse_followup_json(response_text)
+        followup_result = parse_followup_json(raw_result)
         
         logger.info(f"Follow-up analysis complete: {followup_result}")
         return followup_result
         
     except Exception as e:
-        logger.error(f"Follow-up analysis failed: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Follow-up analysis failed: %s", e)
         # Return safe default (no follow-up) on error
         return {
             "needs_followup": False,
@@ -84,7 +123,8 @@ def parse_followup_json(response_text):
     Parse and validate the JSON response from follow-up detection.
     
     Args:
-        response_text: Raw text response from the model
+        response_text: Raw text response from the model, or the already
+            decoded tool input
     
     Returns:
         dict: Validated follow-up result
@@ -92,30 +132,28 @@ def parse_followup_json(response_text):
     logger.info("Parsing follow-up JSON response")
     
     try:
-        # Try to parse JSON
-        result = json.loads(response_text)
+        # Try to parse JSON (tool input arrives already decoded)
+        if isinstance(response_text, dict):
+            result = dict(response_text)
+        else:
+            result = serialization.loads(response_text)
         
         # Validate required fields
-        required_fields = ["needs_followup", "request_type", "priority", "conversation_flag"]
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in result:
                 logger.warning(f"Missing required field: {field}")
                 raise ValueError(f"Missing required field: {field}")
         
         # Validate field values
-        valid_request_types = ["crisis", "normal", "none"]
-        valid_priorities = ["urgent", "normal"]
-        valid_flags = ["crisis", "followup", "none"]
-        
-        if result["request_type"] not in valid_request_types:
+        if result["request_type"] not in VALID_REQUEST_TYPES:
             logger.warning(f"Invalid request_type: {result['request_type']}")
             result["request_type"] = "none"
         
-        if result["priority"] not in valid_priorities:
+        if result["priority"] not in VALID_PRIORITIES:
             logger.warning(f"Invalid priority: {result['priority']}")
             result["priority"] = "normal"
         
-        if result["conversation_flag"] not in valid_flags:
+        if result["conversation_flag"] not in VALID_FLAGS:
             logger.warning(f"Invalid conversation_flag: {result['conversation_flag']}")
             result["conversation_flag"] = "none"
         
@@ -143,7 +181,7 @@ def parse_followup_json(response_text):
         logger.info("JSON parsed and validated successfully")
         return result
         
-    except json.JSONDecodeError as e:
+    except serialization.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON: {e}")
         logger.debug(f"Response text: {response_text}")
         # Return safe default
@@ -157,8 +195,7 @@ def parse_followup_json(response_text):
         }
     
     except Exception as e:
-        logger.error(f"JSON validation error: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("JSON validation error: %s", e)
         # Return safe default
         return {
             "needs_followup": False,
@@ -170,78 +207,56 @@ def parse_followup_json(response_text):
         }
 
 
-def process_followup_result(followup_result, conversation_id, timestamp, user_info):
+def build_followup_fields(followup_result, conversation_id, user_info):
     """
-    Process the follow-up detection result and update DynamoDB accordingly.
+    Decide whether a follow-up record should be created for a detection result.
     
     Args:
         followup_result: Result from analyze_for_followup()
         conversation_id: ID of the conversation
-        timestamp: Timestamp of the conversation
         user_info: User information dictionary
+    
+    Returns:
+        dict: Follow-up record fields for dynamodb_utils.save_conversation's
+            followup argument, or None when
+            no follow-up is needed or no contact info was provided
     """
-    logger.info(f"Processing follow-up result for conversation {conversation_id}")
+    # Only create follow-up record if needed AND contact info exists
+    if not followup_result['needs_followup']:
+        logger.info(f"No follow-up needed for conversation {conversation_id}")
+        return None
     
-    try:
-        # Always update conversation flag if it's not 'none'
-        if followup_result['conversation_flag'] != 'none':
-            logger.info(f"Updating conversation flag to: {followup_result['conversation_flag']}")
-            dynamodb_utils.update_conversation_flag(
-                conversation_id=conversation_id,
-                timestamp=timestamp,
-                new_flag=followup_result['conversation_flag']
-            )
-        
-        # Only create follow-up record if needed AND contact info exists
-        if followup_result['needs_followup']:
-            email = user_info.get('email')
-            phone = user_info.get('phone')
-            
-            if email or phone:
-                logger.info(f"Creating follow-up record for conversation {conversation_id}")
-                
-                # Determine preferred contact
-                preferred_contact = followup_result.get('preferred_contact')
-                if not preferred_contact:
-                    # Default logic if LLM didn't specify
-                    if email and not phone:
-                        preferred_contact = 'email'
-                    elif phone and not email:
-                        preferred_contact = 'phone'
-                    elif email:  # Both exist, prefer email
-                        preferred_contact = 'email'
-                
-                # Extract user details
-                user_id = dynamodb_utils.extract_user_id(user_info)
-                county = dynamodb_utils.extract_county(user_info)
-                
-                # Generate conversation summary (use reasoning as summary)
-                conversation_summary = followup_result.get('reasoning', 'Follow-up requested')
-                
-                # Create follow-up record
-                dynamodb_utils.save_followup(
-                    conversation_id=conversation_id,
-                    user_id=user_id,
-                    county=county,
-                    email=email,
-                    phone=phone,
-                    preferred_contact=preferred_contact,
-                    conversation_summary=conversation_summary,
-                    request_type=followup_result['request_type'],
-                    priority=followup_result['priority'],
-                    status='new'
-                )
-                
-                logger.info(f"Follow-up record created successfully")
-            else:
-                logger.warning(
-                    f"Follow-up needed for conversation {conversation_id} "
-                    f"but no contact info provided (email: {email}, phone: {phone})"
-                )
-        else:
-            logger.info(f"No follow-up needed for conversation {conversation_id}")
+    email = user_info.get('email')
+    phone = user_info.get('phone')
     
-    except Exception as e:
-        logger.error(f"Failed to process follow-up result: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
-        # Don't raise - we don't want follow-up processing errors to break the conversation
\ No newline at end of file
+    if not (email or phone):
+        logger.warning(
+            f"Follow-up needed for conversation {conversation_id} "
+            f"but no contact info provided (email: {email}, phone: {phone})"
+        )
+        return None
+    
+    # Determine preferred contact
+    preferred_contact = followup_result.get('preferred_contact')
+    if not preferred_contact:
+        # Default logic if LLM didn't specify
+        if email and not phone:
+            preferred_contact = 'email'
+        elif phone and not email:
+            preferred_contact = 'phone'
+        elif email:  # Both exist, prefer email
+            preferred_contact = 'email'
+    
+    return dict(
+        conversation_id=conversation_id,
+        user_id=dynamodb_utils.extract_user_id(user_info),
+        county=dynamodb_utils.extract_county(user_info),
+        email=email,
+        phone=phone,
+        preferred_contact=preferred_contact,
+        # Generate conversation summary (use reasoning as summary)
+        conversation_summary=followup_result.get('reasoning', 'Follow-up requested'),
+        request_type=followup_result['request_type'],
+        priority=followup_result['priority'],
+        status='new'
+    )
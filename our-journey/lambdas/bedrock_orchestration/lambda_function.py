@@ -1,13 +1,29 @@
 import logging
-import boto3
-import json
-import traceback
-import constants  # This configures logging
-from orchestration import orchestrate
+import aws_clients
+import serialization
+import constants
 from botocore.exceptions import ClientError
 
+constants.setup_logging()
 logger = logging.getLogger(__name__)
 
+# Reused across warm invocations for the async self-invoke
+lambda_client = aws_clients.client('lambda')
+
+# orchestration pulls in the Bedrock, DynamoDB and follow-up modules (and
+# builds their clients), which only the background invocation needs; the
+# front-door invocation just re-invokes this function and returns 202.
+_orchestrate = None
+
+
+def get_orchestrate():
+    """Import orchestration on first use and reuse it across warm invocations"""
+    global _orchestrate
+    if _orchestrate is None:
+        from orchestration import orchestrate
+        _orchestrate = orchestrate
+    return _orchestrate
+
 
 # the main entry point for the AWS Lambda function
 def lambda_handler(event, context):
@@ -22,7 +38,7 @@ def lambda_handler(event, context):
         # Handle background processing mode
         if event.get('background_processing'):
             logger.info("Starting background processing")
-            result = orchestrate(event)
+            result = get_orchestrate()(event)
             logger.info("Background processing completed")
 
             return {"statusCode": 200, "body": "Processing completed"}
@@ -34,7 +50,6 @@ def lambda_handler(event, context):
         
         # Initiate asynchronous processing
         logger.info("Initiating async processing")
-        lambda_client = boto3.client('lambda')
         
         # Create background event
         background_event = event.copy()
@@ -44,7 +59,7 @@ def lambda_handler(event, context):
         response = lambda_client.invoke(
             FunctionName=context.function_name,
             InvocationType='Event',
-            Payload=json.dumps(background_event)
+            Payload=serialization.dumps(background_event)
         )
         
         logger.info(f"Async invocation initiated with status: {response['StatusCode']}")
@@ -52,13 +67,11 @@ def lambda_handler(event, context):
         return {"statusCode": 202, "body": "Processing initiated"}
         
     except ClientError as e:
-        logger.error(f"AWS Client Error: {e}")
-        logger.debug(f"ClientError traceback: {traceback.format_exc()}")
+        logger.exception("AWS Client Error: %s", e)
         return {"statusCode": 500, "body": "Service error"}
         
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        logger.debug(f"Unexpected error traceback: {traceback.format_exc()}")
+        logger.exception("Unexpected error: %s", e)
         return {"statusCode": 500, "body": "Internal error"}
     
     
\ No newline at end of file
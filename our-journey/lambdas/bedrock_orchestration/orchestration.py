@@ -1,21 +1,31 @@
-import json
 import logging
-import traceback
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from chatbot_config import get_prompt, get_config, get_id
 from utilities import (
+    BREAK_TOKEN,
     converse_with_model,
     parse_and_send_response,    
     execute_knowledge_base_query,
+    format_kb_results,
     format_results_for_response,
 )
 import dynamodb_utils
 import followup_detector
-import constants  # This configures logging
+import response_cache
+import serialization
+import constants
 
 logger = logging.getLogger(__name__)
 
+# Model settings are static, so resolve them once per container
+MODEL_ID = get_id()
+MODEL_CONFIG = get_config()
+
+# Shared across warm invocations; runs follow-up detection alongside the
+# main response so both Bedrock calls are in flight at the same time
+_executor = ThreadPoolExecutor(max_workers=4)
+
 
 def apply_default_user_info(user_info):
     """
@@ -67,7 +77,7 @@ def orchestrate(event):
     
     try:
         # Parse request body
-        body = json.loads(event["body"])
+        body = serialization.loads(event["body"])
         chatHistory = body.get("messages", [])
         userInfo = body.get("userInfo", {})
         
@@ -86,12 +96,60 @@ def orchestrate(event):
 
         logger.info(f"Parsed {len(chatHistory)} messages")
 
-        # Generate response
-        response = respond_to_query(chatHistory=chatHistory, userInfo=userInfo)
+        # Look up the existing conversation's version while the response is
+        # generated; it is only needed when the conversation is saved
+        version_future = _executor.submit(
+            dynamodb_utils.get_latest_conversation_version,
+            conversation_id
+        )
+
+        # Start follow-up detection now; it only needs the user's message
+        followup_future = None
+        user_message = get_latest_user_message(chatHistory)
+        if user_message:
+            logger.info("Analyzing conversation for follow-up needs")
+            followup_future = _executor.submit(
+                followup_detector.analyze_for_followup,
+                user_message=user_message,
+                user_info=userInfo,
+                conversation_id=conversation_id
+            )
+
+        # Answer from the response cache when the same question was seen,
+        # otherwise generate a response. The memory tier is checked first;
+        # on a miss the knowledge base retrieval is started alongside the
+        # table lookup so a miss doesn't pay for both in sequence
+        cache_key = response_cache.prepare(chatHistory, userInfo)
+        cached_response = response_cache.lookup_memory(cache_key)
+        results_future = None
+        if cached_response is None and cache_key is not None:
+            results_future = _executor.submit(
+                retrieve_answers_from_database,
+                question=get_specific_question(chatHistory),
+                userInfo=userInfo
+            )
+            cached_response = response_cache.lookup_table(cache_key)
+            if cached_response:
+                discard_future(results_future)
+        if cached_response:
+            response = response_cache.as_stream(cached_response)
+        else:
+            response = respond_to_query(
+                chatHistory=chatHistory,
+                userInfo=userInfo,
+                results_future=results_future
+            )
+        
+        # Stream the response and capture the full assistant message. The
+        # cache keeps the break tokens so a replay is split the same way;
+        # the saved conversation does not
+        raw_message = parse_and_send_response(
+            response, connectionId, capture_text=True, keep_break_tokens=True
+        )
+        assistant_message = raw_message.replace(BREAK_TOKEN, "") if raw_message else raw_message
         
-        # Stream the response and capture the full assistant message
-        # parse_and_send_response will be modified to return the captured text
-        assistant_message = parse_and_send_response(response, connectionId, capture_text=True)
+        if not cached_response:
+            response_cache.store(cache_key, raw_message)
         
         # Add the assistant's response to chat history if we captured it
         if assistant_message:
@@ -104,14 +162,15 @@ def orchestrate(event):
             save_conversation_to_db(
                 conversation_id=conversation_id,
                 chat_history=chatHistory,
-                user_info=userInfo
+                user_info=userInfo,
+                followup_future=followup_future,
+                version_future=version_future
             )
         
         logger.info("Answer processed and saved successfully")
               
     except Exception as e:
-        logger.error(f"Orchestration failed: {str(e)}")
-        logger.debug(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Orchestration failed: %s", e)
         
         if connectionId:
             parse_and_send_response("An unexpected error occurred. Please try again later.", 
@@ -121,26 +180,49 @@ def orchestrate(event):
     return None
 
 
+def discard_future(future):
+    """Cancel a future whose result is no longer needed, logging its failure if it already started"""
+    if not future.cancel():
+        future.add_done_callback(_log_discarded_failure)
+
+
+def _log_discarded_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.warning("Discarded background task failed: %s", error)
+
+
+# Extract the question being asked from the chat history.
+def get_specific_question(chatHistory):
+    """Return the text of the last message, which is the question being asked"""
+    content = chatHistory[-1].get('content')
+    return content[-1].get('text', '') if content else ''
+
+
 # Respond to the user's query by orchestrating multiple stages.
-def respond_to_query(chatHistory, userInfo):
+def respond_to_query(chatHistory, userInfo, results_future=None):
     """
     Orchestrate the multi-stage pipeline to respond to  queries.
+    If results_future is given, the knowledge base retrieval was already
+    started by the caller and its result is used for stage 1.
     """
     logger.info("Starting SQL query pipeline")
     
     try:
-
-        
-        specific_question = chatHistory[-1]['content'][-1].get('text', '') if chatHistory[-1].get('content') else ''
+        specific_question = get_specific_question(chatHistory)
 
         # Stage 1: get answers from the database
         logger.info("Retrieving answers from the database")
-        results = retrieve_answers_from_database(
-            question=specific_question, 
-            userInfo=userInfo
-        )
+        if results_future is not None:
+            results = results_future.result()
+        else:
+            results = retrieve_answers_from_database(
+                question=specific_question, 
+                userInfo=userInfo
+            )
 
-        # Check if results are empty
+        # Keep only the retrieved text, then check if results are empty
+        results = format_kb_results(results)
         if not results:
             logger.warning("No results found for the specific question")
             results = "No results found for your query."
@@ -162,8 +244,7 @@ def respond_to_query(chatHistory, userInfo):
         return final_response
         
     except Exception as e:
-        logger.error(f"SQL pipeline failed: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("SQL pipeline failed: %s", e)
         raise
 
 
@@ -178,10 +259,10 @@ def get_final_response(chatHistory, results, userInfo):
     try:
 
         response = converse_with_model(
-            get_id(),
+            MODEL_ID,
             chatHistory,
-            config=get_config(),
-            system=get_prompt(results=results, userInfo=userInfo),
+            config=MODEL_CONFIG,
+            system=get_prompt(results=results, userInfo=get_prompt_user_info(userInfo)),
             streaming=True
         )
         
@@ -193,6 +274,26 @@ def get_final_response(chatHistory, results, userInfo):
         raise
 
 
+# userInfo fields included in the knowledge base query, in order.
+# Each formatter returns None when the field should be left out.
+# Contact details don't change which resources match, and including them
+# would give every user their own knowledge base cache entry.
+USER_CONTEXT_FIELDS = (
+    ('county', lambda v: f"located in {v}" if v else None),
+    ('releaseDate', lambda v: f"release date is {v}" if v else None),
+    ('age18Plus', lambda v: None if v is None else ("over 18" if v else "under 18")),
+    ('gender', lambda v: f"gender is {v}" if v else None),
+)
+
+def get_prompt_user_info(user_info):
+    """Project userInfo onto the fields the prompt uses, skipping missing ones"""
+    return {
+        key: user_info[key]
+        for key in constants.PROMPT_USER_INFO_FIELDS
+        if user_info.get(key) is not None
+    }
+
+
 def retrieve_answers_from_database(question, userInfo):
     """
     Retrieve answers from the database based on the specific question.
@@ -200,32 +301,16 @@ def retrieve_answers_from_database(question, userInfo):
     """
     logger.info("Retrieving answers from the database")
     
-    # Convert userInfo to readable text, handling missing fields
-    user_context_parts = []
+    # Convert userInfo to readable text, skipping missing fields
+    user_context_parts = [
+        part
+        for part in (describe(userInfo.get(key)) for key, describe in USER_CONTEXT_FIELDS)
+        if part
+    ]
     
-    if userInfo.get('county'):
-        user_context_parts.append(f"located in {userInfo['county']}")
-    
-    if userInfo.get('releaseDate'):
-        user_context_parts.append(f"release date is {userInfo['releaseDate']}")
-    
-    if userInfo.get('age18Plus') is not None:
-        age_status = "over 18" if userInfo['age18Plus'] else "under 18"
-        user_context_parts.append(age_status)
-    
-    if userInfo.get('gender'):
-        user_context_parts.append(f"gender is {userInfo['gender']}")
-    
-    if userInfo.get('email'):
-        user_context_parts.append(f"email is {userInfo['email']}")
-    
-    if userInfo.get('phone'):
-        user_context_parts.append(f"phone is {userInfo['phone']}")
-    
-    # Combine parts into a sentence, or use empty string if no user info
+    # Combine parts into a sentence in one step, or send the bare question if no user info
     if user_context_parts:
-        user_context = f"User context: {', '.join(user_context_parts)}."
-        query = f"{user_context}\n\nQuestion: {question}"
+        query = f"User context: {', '.join(user_context_parts)}.\n\nQuestion: {question}"
     else:
         query = question
     
@@ -239,7 +324,24 @@ def retrieve_answers_from_database(question, userInfo):
         raise
 
 
-def save_conversation_to_db(conversation_id, chat_history, user_info):
+def get_latest_user_message(chat_history):
+    """
+    Return the text of the most recent user message, or "" if there is none.
+    
+    Args:
+        chat_history: Full list of messages
+    """
+    for msg in reversed(chat_history):
+        if msg.get('role') == 'user':
+            content = msg.get('content', [])
+            if isinstance(content, list) and content:
+                return content[0].get('text', '')
+            return str(content)
+    return ""
+
+
+def save_conversation_to_db(conversation_id, chat_history, user_info, followup_future=None,
+                            version_future=None):
     """
     Save the conversation to DynamoDB and analyze for follow-up needs.
     
@@ -247,6 +349,10 @@ def save_conversation_to_db(conversation_id, chat_history, user_info):
         conversation_id: Unique conversation identifier
         chat_history: Full list of messages
         user_info: User information dictionary
+        followup_future: Future for a follow-up analysis already started by
+            orchestrate; if None the analysis is run here
+        version_future: Future for the latest-version lookup already
+            started by orchestrate; if None the lookup is done here
     """
     logger.info(f"Saving conversation {conversation_id} to DynamoDB")
     
@@ -269,61 +375,62 @@ def save_conversation_to_db(conversation_id, chat_history, user_info):
                 last_message = str(content)
         
         # Try to get existing conversation to reuse timestamp
-        existing_conversation = dynamodb_utils.get_latest_conversation(conversation_id)
+        if version_future is not None:
+            existing_version = version_future.result()
+        else:
+            existing_version = dynamodb_utils.get_latest_conversation_version(conversation_id)
         
-        if existing_conversation:
-            # Reuse existing timestamp for updates
-            timestamp = existing_conversation['timestamp']
+        stored_message_count = None
+        if existing_version:
+            # Reuse existing timestamp for updates and only send new messages
+            timestamp = existing_version['timestamp']
+            stored_message_count = existing_version['messageCount']
             logger.info(f"Updating existing conversation with timestamp: {timestamp}")
         else:
             # Create new timestamp for first save
-            timestamp = datetime.utcnow().isoformat()
+            timestamp = dynamodb_utils.utc_now_iso()
             logger.info(f"Creating new conversation with timestamp: {timestamp}")
         
-        # Save to DynamoDB with default flag 'none' initially
+        # Analyze for follow-up needs
+        if followup_future is not None:
+            followup_result = followup_future.result()
+        else:
+            followup_result = None
+            user_message = get_latest_user_message(chat_history)
+            if user_message:
+                logger.info("Analyzing conversation for follow-up needs")
+                followup_result = followup_detector.analyze_for_followup(
+                    user_message=user_message,
+                    user_info=user_info,
+                    conversation_id=conversation_id
+                )
+        
+        # The flag and any follow-up record are written together with the
+        # conversation in a single transaction
+        flag = 'none'
+        followup_fields = None
+        if followup_result is not None:
+            flag = followup_result['conversation_flag']
+            followup_fields = followup_detector.build_followup_fields(
+                followup_result, conversation_id, user_info
+            )
+        
         saved_conversation = dynamodb_utils.save_conversation(
             conversation_id=conversation_id,
             user_id=user_id,
             county=county,
             messages=chat_history,
             user_info=user_info,
-            flag='none',  # Default flag, will be updated if follow-up is needed
+            flag=flag,
             categories=categories,
             last_message=last_message[:200],  # Truncate to 200 chars for preview
-            timestamp=timestamp  # Pass timestamp to save function
+            timestamp=timestamp,  # Pass timestamp to save function
+            followup=followup_fields,
+            stored_message_count=stored_message_count
         )
         
         logger.info(f"Conversation {conversation_id} saved successfully")
         
-        # Get the user's message for follow-up analysis
-        user_message = ""
-        for msg in reversed(chat_history):
-            if msg.get('role') == 'user':
-                content = msg.get('content', [])
-                if isinstance(content, list) and content:
-                    user_message = content[0].get('text', '')
-                else:
-                    user_message = str(content)
-                break
-        
-        # Analyze for follow-up needs
-        if user_message:
-            logger.info("Analyzing conversation for follow-up needs")
-            followup_result = followup_detector.analyze_for_followup(
-                user_message=user_message,
-                user_info=user_info,
-                conversation_id=conversation_id
-            )
-            
-            # Process the follow-up result (update flags, create follow-up records)
-            followup_detector.process_followup_result(
-                followup_result=followup_result,
-                conversation_id=conversation_id,
-                timestamp=timestamp,  # Use the same timestamp
-                user_info=user_info
-            )
-        
     except Exception as e:
-        logger.error(f"Failed to save conversation to DB: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Failed to save conversation to DB: %s", e)
         # Don't raise - we don't want DB errors to break the user experience
\ No newline at end of file
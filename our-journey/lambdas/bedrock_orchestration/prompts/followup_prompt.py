@@ -1,5 +1,5 @@
 import logging
-import constants  # This configures logging
+from prompts.template import compile_template
 
 logger = logging.getLogger(__name__)
 
@@ -77,4 +77,7 @@ Rules:
 - reasoning should explain why you made this classification
 
 Remember: Only output the JSON object, nothing else.
-""".strip()
\ No newline at end of file
+""".strip()
+
+# Render the follow-up prompt: render(userInfo=..., userMessage=...)
+render = compile_template(prompt)
@@ -0,0 +1,23 @@
+import string
+
+
+def compile_template(template):
+    """
+    Split a str.format template into (literal, field_name) pairs once and
+    return a render(**values) function equivalent to template.format(**values).
+    
+    Rendering is then a single join instead of re-parsing the template on
+    every call, and {{ }} escapes are resolved at compile time.
+    """
+    parts = tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+    
+    def render(**values):
+        return ''.join(
+            literal if field_name is None else literal + str(values[field_name])
+            for literal, field_name in parts
+        )
+    
+    return render
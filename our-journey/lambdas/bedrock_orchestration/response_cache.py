@@ -0,0 +1,276 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+import dynamodb_utils
+import constants
+from prompts import prompt
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+# Answers to first-turn questions are reused for the same question (after
+# case and whitespace normalization) from the same user segment. Matching
+# is exact on purpose: the question text carries its language, so a
+# Spanish question never gets an English answer, and nothing is reused
+# for a question that merely looks similar.
+#
+# Lookups go to an in-memory LRU first, then to the DynamoDB table shared
+# by all containers. Follow-up turns are never cached: their answer
+# depends on the history.
+
+enabled = bool(constants.RESPONSE_CACHE_TABLE)
+
+if enabled:
+    cache_table = dynamodb_utils.dynamodb.Table(constants.RESPONSE_CACHE_TABLE)
+
+# (segment, question hash) -> (expires_at, response text),
+# least recently used first
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+# Questions with contact details or that introduce the user are never
+# cached, since the answer may repeat them back to another user
+_PERSONAL_DETAILS_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+"                      # email address
+    r"|\+?\d[\d\s().-]{6,}\d"                       # phone or ID number
+    r"|\bmy (?:name|phone|number|cell|email|address|birthday|date of birth|ssn|social security)\b"
+    r"|\b(?:i am|i'm|im|this is|call me) [a-z]+ [a-z]+\b(?=[.,!]|$)"
+    r"|\b(?:i live at|my case|my case number|my probation officer|my parole officer|my po)\b"
+    r"|\b(?:me llamo|mi nombre|mi tel[eé]fono|mi n[uú]mero|mi correo|mi direcci[oó]n)\b",
+    re.IGNORECASE
+)
+
+
+class CacheKey:
+    """Segment and normalized question for a cacheable request"""
+
+    def __init__(self, segment, question):
+        self.segment = segment
+        self.question_hash = hashlib.blake2b(question.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def has_personal_details(text):
+    """True if text contains contact details or other personal information"""
+    return _PERSONAL_DETAILS_PATTERN.search(text) is not None
+
+
+# releaseDate values sent by the frontend's release-timing question
+RELEASE_BUCKETS = {
+    'not-yet': 'upcoming',
+    'less-30': 'recent',
+    '1-6-months': 'recent',
+    '6-12-months': 'earlier',
+    'more-year': 'earlier',
+}
+
+
+def get_release_bucket(release_date, today=None):
+    """
+    Bucket releaseDate the way the prompt personalizes on it: upcoming,
+    recent or earlier. The frontend sends one of RELEASE_BUCKETS; a
+    YYYY-MM-DD date only appears as the server-side default.
+    """
+    bucket = RELEASE_BUCKETS.get(release_date)
+    if bucket is not None:
+        return bucket
+    try:
+        released = date.fromisoformat(str(release_date)[:10])
+    except ValueError:
+        return 'earlier'
+    days = ((today or date.today()) - released).days
+    if days < 0:
+        return 'upcoming'
+    return 'recent' if days <= 90 else 'earlier'
+
+
+def _describe_age(age18_plus):
+    # Same tri-state handling as the knowledge base user context
+    return 'unknown' if age18_plus is None else ('adult' if age18_plus else 'minor')
+
+
+# How each prompt field is bucketed in the segment; other fields are
+# used as given
+SEGMENT_BUCKETS = {
+    'releaseDate': get_release_bucket,
+    'age18Plus': _describe_age,
+}
+
+
+def get_segment(user_info):
+    """
+    Bucket userInfo into a small segment so answers are only shared
+    between users who would get the same answer. Every field the prompt
+    personalizes on (constants.PROMPT_USER_INFO_FIELDS) is part of the
+    segment. The prompt hash leads the segment, so editing the prompt
+    starts a fresh cache.
+    """
+    parts = [prompt.PROMPT_HASH]
+    for field in constants.PROMPT_USER_INFO_FIELDS:
+        value = user_info.get(field)
+        bucket = SEGMENT_BUCKETS.get(field)
+        if bucket is not None:
+            parts.append(bucket(value))
+        else:
+            parts.append(str(value).strip().lower() if value not in (None, '') else 'unknown')
+    return '|'.join(parts)
+
+
+def is_cacheable(chat_history):
+    """Only first-turn questions are cached, and only when the cache is on"""
+    return enabled and len(chat_history) == 1
+
+
+def prepare(chat_history, user_info):
+    """
+    Build the cache key for a request.
+
+    Args:
+        chat_history: Full list of messages (must be a single user turn)
+        user_info: User information dictionary
+
+    Returns:
+        CacheKey or None if the request is not cacheable, contains
+        personal details, or the cache is off
+    """
+    if not is_cacheable(chat_history):
+        return None
+
+    content = chat_history[0].get('content')
+    question = content[-1].get('text', '') if content else ''
+    question = ' '.join(question.lower().split())
+    if not question:
+        return None
+
+    if has_personal_details(question):
+        logger.info("Question contains personal details; response cache skipped")
+        return None
+
+    try:
+        return CacheKey(get_segment(user_info), question)
+    except Exception as e:
+        logger.warning("Response cache key unavailable: %s", e)
+        return None
+
+
+def _memory_get(cache_key):
+    key = (cache_key.segment, cache_key.question_hash)
+    with _lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return response
+
+
+def _memory_put(cache_key, response):
+    key = (cache_key.segment, cache_key.question_hash)
+    with _lock:
+        _memory[key] = (time.monotonic() + constants.EXACT_CACHE_TTL_SECONDS, response)
+        _memory.move_to_end(key)
+        if len(_memory) > constants.EXACT_CACHE_MAX_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def lookup_memory(cache_key):
+    """
+    Find a cached answer in this container's memory tier.
+
+    Args:
+        cache_key: CacheKey from prepare() (may be None)
+
+    Returns:
+        str: Cached response text, or None on a miss
+    """
+    if cache_key is None:
+        return None
+
+    response = _memory_get(cache_key)
+    if response is not None:
+        logger.info("Response cache hit (memory)")
+    return response
+
+
+def lookup_table(cache_key):
+    """
+    Find a cached answer in the shared table, after a memory-tier miss.
+
+    Args:
+        cache_key: CacheKey from prepare() (may be None)
+
+    Returns:
+        str: Cached response text, or None on a miss
+    """
+    if cache_key is None:
+        return None
+
+    try:
+        item = cache_table.get_item(
+            Key={'segment': cache_key.segment, 'questionHash': cache_key.question_hash},
+            ProjectionExpression='#response, #ttl',
+            ExpressionAttributeNames={'#response': 'response', '#ttl': 'ttl'}
+        ).get('Item')
+    except Exception as e:
+        logger.warning("Response cache lookup failed: %s", e)
+        return None
+
+    # TTL deletion is not immediate
+    if item is None or int(item.get('ttl', 0)) <= int(time.time()):
+        logger.info("Response cache miss")
+        return None
+
+    logger.info("Response cache hit (table)")
+    _memory_put(cache_key, item['response'])
+    return item['response']
+
+
+def store(cache_key, response):
+    """
+    Cache a freshly generated answer.
+
+    Args:
+        cache_key: CacheKey from prepare() (may be None)
+        response: Full assistant response text, with its BREAK_TOKENs
+    """
+    if cache_key is None or not response:
+        return
+
+    _memory_put(cache_key, response)
+
+    try:
+        cache_table.put_item(Item={
+            'segment': cache_key.segment,
+            'questionHash': cache_key.question_hash,
+            'createdAt': dynamodb_utils.utc_now_iso(),
+            'response': response,
+            'ttl': int(time.time()) + constants.RESPONSE_CACHE_TTL_SECONDS
+        })
+        logger.info("Response stored in response cache")
+
+    except Exception as e:
+        logger.warning("Failed to store response in response cache: %s", e)
+
+
+def as_stream(response):
+    """
+    Wrap a cached response in the event shape of converse_stream so it is
+    sent to the client exactly like a model response; its BREAK_TOKENs go
+    through the same scanner and are sent as break frames again.
+    """
+    return {
+        'stream': [
+            {'messageStart': {'role': 'assistant'}},
+            {'contentBlockDelta': {'delta': {'text': response}, 'contentBlockIndex': 0}},
+            {'contentBlockStop': {'contentBlockIndex': 0}},
+            {'messageStop': {'stopReason': 'end_turn'}}
+        ]
+    }
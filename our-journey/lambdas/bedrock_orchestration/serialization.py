@@ -0,0 +1,27 @@
+import json
+
+# ============================================================================
+# JSON SERIALIZATION
+# ============================================================================
+
+# orjson is used when it is packaged with the Lambda (it is not part of the
+# runtime), otherwise the stdlib json module with the same compact output.
+# dumps() returns bytes with orjson and str with json; boto3 blob parameters
+# such as post_to_connection's Data and invoke's Payload accept either.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+    dumps = orjson.dumps
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    JSONDecodeError = orjson.JSONDecodeError
+else:
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+    def dumps(obj):
+        """Serialize obj to compact JSON"""
+        return json.dumps(obj, separators=(',', ':'))
@@ -1,9 +1,11 @@
-import boto3
 from botocore.exceptions import ClientError
-import json
 import logging
-import traceback
-import constants  # This configures logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import aws_clients
+import serialization
+import constants
 
 
 logger = logging.getLogger(__name__)
@@ -15,20 +17,19 @@ def get_clients():
     logger.info("Initializing AWS clients")
     
     try:
-        apiGatewayURL = "https" + constants.API_GATEWAY_URL[3:] + "/prod"
-        logger.info(f"API Gateway URL: {apiGatewayURL}")
+        logger.info("API Gateway URL: %s", constants.API_GATEWAY_MANAGEMENT_URL)
         
         # Initialize AWS service clients
-        gateway = boto3.client("apigatewaymanagementapi", endpoint_url=apiGatewayURL)
-        bedrock = boto3.client('bedrock-runtime')
-        s3_client = boto3.client('s3')
-        agent = boto3.client('bedrock-agent-runtime')
+        gateway = aws_clients.client("apigatewaymanagementapi", endpoint_url=constants.API_GATEWAY_MANAGEMENT_URL)
+        bedrock = aws_clients.client('bedrock-runtime')
+        s3_client = aws_clients.client('s3')
+        agent = aws_clients.client('bedrock-agent-runtime')
         
         logger.info("AWS clients initialized successfully")
         return gateway, bedrock, s3_client, agent
         
     except Exception as e:
-        logger.error(f"Failed to initialize AWS clients: {e}")
+        logger.error("Failed to initialize AWS clients: %s", e)
         raise
 
 # Initialize AWS service clients
@@ -38,31 +39,33 @@ gateway, bedrock, s3_client, agent = get_clients()
 # Function to send JSON data to client via WebSocket connection
 def send_to_gateway(connectionId, json_data):
     """Send JSON data to client via WebSocket connection"""
-    logger.info(f"Sending data to connection: {json_data}")
+    # Called for every streamed frame, so only logged at DEBUG
+    logger.debug("Sending data to connection: %s", json_data)
     
     try:
         gateway.post_to_connection(
             ConnectionId=connectionId, 
-            Data=json.dumps(json_data)
+            Data=serialization.dumps(json_data)
         )
-        logger.info("Data sent successfully")
+        logger.debug("Data sent successfully")
         
     except ClientError as e:
-        logger.error(f"Failed to send to gateway: {e}")
+        logger.error("Failed to send to gateway: %s", e)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error sending to gateway: {e}")
+        logger.error("Unexpected error sending to gateway: %s", e)
         raise
 
 
+# Guardrail settings are fixed for the life of the container
+_GUARDRAILS_CONFIG = constants.GUARDRAILS_CONFIG
+_GUARDRAILS_CONFIG_STREAMING = constants.GUARDRAILS_CONFIG_STREAMING
+
+
 # Function to converse with Bedrock AI model
 def converse_with_model(modelId, chatHistory, config=None, system=None, streaming=False):
     """Get response from Bedrock AI model with optional streaming"""
-    logger.info(f"Conversing with model: {modelId}, streaming: {streaming}")
-
-    guardrails_streaming = constants.GUARDRAILS_CONFIG_STREAMING
-
-    guardrails = constants.GUARDRAILS_CONFIG
+    logger.info("Conversing with model: %s, streaming: %s", modelId, streaming)
     
     try:
         if streaming:
@@ -71,7 +74,7 @@ def converse_with_model(modelId, chatHistory, config=None, system=None, streamin
                 messages=chatHistory,
                 inferenceConfig=config,
                 system=system,
-                guardrailConfig=guardrails_streaming
+                guardrailConfig=_GUARDRAILS_CONFIG_STREAMING
             )
         else:
             response = bedrock.converse(
@@ -79,26 +82,25 @@ def converse_with_model(modelId, chatHistory, config=None, system=None, streamin
                 messages=chatHistory,
                 inferenceConfig=config,
                 system=system,
-                guardrailConfig=guardrails
+                guardrailConfig=_GUARDRAILS_CONFIG
             )
         
         logger.info("Model conversation completed")
         return response
         
     except ClientError as e:
-        logger.error(f"Bedrock client error: {e}")
+        logger.error("Bedrock client error: %s", e)
         raise
     except Exception as e:
-        logger.error(f"Model conversation failed: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Model conversation failed: %s", e)
         raise
 
 
 # Function to converse with Bedrock AI model WITHOUT guardrails
 # Used for internal analysis tasks like follow-up detection
-def converse_with_model_no_guardrails(modelId, chatHistory, config=None, system=None, streaming=False):
+def converse_with_model_no_guardrails(modelId, chatHistory, config=None, system=None, streaming=False, tool_config=None):
     """Get response from Bedrock AI model WITHOUT guardrails - for internal analysis only"""
-    logger.info(f"Conversing with model (no guardrails): {modelId}, streaming: {streaming}")
+    logger.info("Conversing with model (no guardrails): %s, streaming: %s", modelId, streaming)
     
     try:
         # Build parameters - only include system if it's not None
@@ -113,6 +115,9 @@ def converse_with_model_no_guardrails(modelId, chatHistory, config=None, system=
         if system:
             api_params['system'] = system
         
+        if tool_config:
+            api_params['toolConfig'] = tool_config
+        
         # Call appropriate API
         if streaming:
             response = bedrock.converse_stream(**api_params)
@@ -123,11 +128,10 @@ def converse_with_model_no_guardrails(modelId, chatHistory, config=None, system=
         return response
         
     except ClientError as e:
-        logger.error(f"Bedrock client error: {e}")
+        logger.error("Bedrock client error: %s", e)
         raise
     except Exception as e:
-        logger.error(f"Model conversation failed: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Model conversation failed: %s", e)
         raise
 
 
@@ -136,16 +140,142 @@ def converse_with_model_no_guardrails(modelId, chatHistory, config=None, system=
 # Pure is when the response is a string and not a dict from the model
 # Info is an update for the frontend from before the final response is made (Info messages never stream, and are always sent as a single message)
 # capture_text is when we need to capture the full text being streamed for later use (e.g., saving to DB)
-def parse_and_send_response(response, connectionId, classic=None, pure=None, info=None, capture_text=False):
+# keep_break_tokens keeps a BREAK_TOKEN in the captured text wherever a break was sent, so it can be replayed later
+BREAK_TOKEN = "BREAK_TOKEN"
+
+
+class _BreakTokenScanner:
+    """
+    Split streamed text on BREAK_TOKEN, including tokens that span deltas.
+    
+    Only a trailing partial match (a prefix of BREAK_TOKEN) is held back
+    between deltas, so each character is scanned a bounded number of times.
+    """
+    
+    def __init__(self):
+        self.held = 0  # Length of the BREAK_TOKEN prefix held from the last delta
+    
+    def feed(self, text):
+        """
+        Returns:
+            list: Text segments to send, with None where a BREAK_TOKEN was
+        """
+        data = BREAK_TOKEN[:self.held] + text if self.held else text
+        segments = []
+        start = 0
+        
+        # Complete tokens
+        index = data.find(BREAK_TOKEN)
+        while index != -1:
+            if index > start:
+                segments.append(data[start:index])
+            segments.append(None)
+            start = index + len(BREAK_TOKEN)
+            index = data.find(BREAK_TOKEN, start)
+        
+        # Hold back the tail that could still become a token. The token's
+        # first character doesn't recur in it, so only the last occurrence of
+        # that character in the final len(BREAK_TOKEN) - 1 characters can
+        # start a partial match.
+        self.held = 0
+        candidate = data.rfind(BREAK_TOKEN[0], max(start, len(data) - len(BREAK_TOKEN) + 1))
+        if candidate != -1 and BREAK_TOKEN.startswith(data[candidate:]):
+            self.held = len(data) - candidate
+        
+        end = len(data) - self.held
+        if end > start:
+            segments.append(data[start:end])
+        return segments
+    
+    def finish(self):
+        """Return held text that never became a full token"""
+        leftover = BREAK_TOKEN[:self.held]
+        self.held = 0
+        return leftover
+
+
+# A single worker posts frames in the order they were queued, so reading
+# the Bedrock stream never waits on an API Gateway round trip
+_gateway_sender = ThreadPoolExecutor(max_workers=1)
+
+
+class _GatewaySender:
+    """Queue frames for one connection on the shared sender thread"""
+    
+    def __init__(self, connectionId):
+        self.connectionId = connectionId
+        self.pending = deque()
+    
+    def send(self, json_data):
+        # Surface a failed post (e.g. the client disconnected) without waiting
+        while self.pending and self.pending[0].done():
+            self.pending.popleft().result()
+        self.pending.append(_gateway_sender.submit(send_to_gateway, self.connectionId, json_data))
+    
+    def wait(self):
+        """Block until every queued frame is sent; raises the first failure"""
+        while self.pending:
+            self.pending.popleft().result()
+    
+    def drain(self):
+        """
+        Block until queued frames are sent without raising, so nothing from
+        this response reaches the client after a later error message. After
+        the first failed post the remaining frames are dropped.
+        """
+        while self.pending:
+            try:
+                self.pending.popleft().result()
+            except Exception as e:
+                logger.warning("Dropping %s queued frames after failed post: %s", len(self.pending), e)
+                for future in self.pending:
+                    future.cancel()
+                self.pending.clear()
+
+
+class _DeltaBatcher:
+    """
+    Coalesce streamed text deltas into fewer WebSocket frames.
+    
+    Text is sent once STREAM_BATCH_MAX_CHARS characters are pending or
+    STREAM_BATCH_MAX_DELAY_SECONDS have passed since the last frame, and
+    whenever flush() is called before a non-delta event.
+    """
+    
+    def __init__(self, send):
+        self.send = send
+        self.pending = []
+        self.pending_chars = 0
+        self.last_flush = time.monotonic()
+    
+    def add(self, text):
+        if not text:
+            return
+        self.pending.append(text)
+        self.pending_chars += len(text)
+        if (self.pending_chars >= constants.STREAM_BATCH_MAX_CHARS
+                or time.monotonic() - self.last_flush >= constants.STREAM_BATCH_MAX_DELAY_SECONDS):
+            self.flush()
+    
+    def flush(self):
+        if self.pending:
+            self.send({
+                "type": "contentBlockDelta",
+                "data": {"delta": {"text": "".join(self.pending)}}
+            })
+            self.pending.clear()
+            self.pending_chars = 0
+        self.last_flush = time.monotonic()
+
+
+def parse_and_send_response(response, connectionId, classic=None, pure=None, info=None, capture_text=False,
+                            keep_break_tokens=False):
     """Parse streaming response and send events to client in real-time"""
     logger.info("Parsing and sending response")
     
-    # Initialize buffer for BREAK_TOKEN detection
-    buffer = ""
-    BREAK_TOKEN = "BREAK_TOKEN"
-    
-    # Initialize text capture if requested
-    captured_text = "" if capture_text else None
+    # Text sent to the client (BREAK_TOKEN only if keep_break_tokens), if requested
+    captured_parts = []
+    sender = None
     
     try:
 
@@ -177,185 +307,52 @@ def parse_and_send_response(response, connectionId, classic=None, pure=None, inf
         stream = response.get('stream')
         if stream:
             event_count = 0
+            sender = _GatewaySender(connectionId)
+            batcher = _DeltaBatcher(sender.send)
+            scanner = _BreakTokenScanner()
             for event in stream:
                 event_count += 1
                 
                 # Handle content delta events (partial response chunks)
                 if "contentBlockDelta" in event:
-                    contentBlockDelta = event["contentBlockDelta"]
-                    delta_text = contentBlockDelta.get("delta", {}).get("text", "")
-                    
-                    # Capture text if requested (excluding BREAK_TOKEN)
-                    if capture_text and delta_text:
-                        # Don't include BREAK_TOKEN in captured text
-                        captured_text += delta_text.replace(BREAK_TOKEN, "")
-                    
-                    # Process BREAK_TOKEN detection
-                    if buffer == "":
-                        # Buffer is empty
-                        if BREAK_TOKEN in delta_text:
-                            # Full token found - split and send
-                            parts = delta_text.split(BREAK_TOKEN, 1)
-                            before_text = parts[0]
-                            after_text = parts[1] if len(parts) > 1 else ""
-                            
-                            # Send text before token (if exists)
-                            if before_text:
-                                json_data = {
-                                    "type": "contentBlockDelta",
-                                    "data": {
-                                        **contentBlockDelta,
-                                        "delta": {
-                                            **contentBlockDelta.get("delta", {}),
-                                            "text": before_text
-                                        }
-                                    }
-                                }
-                                send_to_gateway(connectionId, json_data)
-                            
+                    delta_text = event["contentBlockDelta"].get("delta", {}).get("text", "")
+                    for segment in scanner.feed(delta_text):
+                        if segment is None:
                             # Send break token message
-                            json_data = {
-                                "type": "breakTokenType"
-                            }
-                            send_to_gateway(connectionId, json_data)
-                            
-                            # Send text after token (if exists)
-                            if after_text:
-                                json_data = {
-                                    "type": "contentBlockDelta",
-                                    "data": {
-                                        **contentBlockDelta,
-                                        "delta": {
-                                            **contentBlockDelta.get("delta", {}),
-                                            "text": after_text
-                                        }
-                                    }
-                                }
-                                send_to_gateway(connectionId, json_data)
-                        else:
-                            # Check if delta ends with partial BREAK_TOKEN
-                            found_partial = False
-                            for i in range(1, min(len(delta_text) + 1, len(BREAK_TOKEN) + 1)):
-                                if delta_text.endswith(BREAK_TOKEN[:i]):
-                                    # Found partial match at end
-                                    prefix = delta_text[:-i]
-                                    suffix = delta_text[-i:]
-                                    
-                                    # Send prefix if exists
-                                    if prefix:
-                                        json_data = {
-                                            "type": "contentBlockDelta",
-                                            "data": {
-                                                **contentBlockDelta,
-                                                "delta": {
-                                                    **contentBlockDelta.get("delta", {}),
-                                                    "text": prefix
-                                                }
-                                            }
-                                        }
-                                        send_to_gateway(connectionId, json_data)
-                                    
-                                    # Buffer the partial match
-                                    buffer = suffix
-                                    found_partial = True
-                                    break
-                            
-                            if not found_partial:
-                                # No partial match, send as normal
-                                json_data = {
-                                    "type": "contentBlockDelta",
-                                    "data": contentBlockDelta
-                                }
-                                send_to_gateway(connectionId, json_data)
-                    else:
-                        # Buffer is not empty - try to complete the pattern
-                        combined = buffer + delta_text
-                        match_length = 0
-                        
-                        # Check character by character
-                        for i, char in enumerate(delta_text):
-                            if buffer + delta_text[:i+1] == BREAK_TOKEN[:len(buffer) + i + 1]:
-                                match_length = i + 1
-                                if buffer + delta_text[:i+1] == BREAK_TOKEN:
-                                    # Pattern complete!
-                                    # Send break token message
-                                    json_data = {
-                                        "type": "breakTokenType"
-                                    }
-                                    send_to_gateway(connectionId, json_data)
-                                    
-                                    # Clear buffer
-                                    buffer = ""
-                                    
-                                    # Send remaining delta if exists
-                                    remaining = delta_text[i+1:]
-                                    if remaining:
-                                        json_data = {
-                                            "type": "contentBlockDelta",
-                                            "data": {
-                                                **contentBlockDelta,
-                                                "delta": {
-                                                    **contentBlockDelta.get("delta", {}),
-                                                    "text": remaining
-                                                }
-                                            }
-                                        }
-                                        send_to_gateway(connectionId, json_data)
-                                    break
-                            else:
-                                # Mismatch - false start
-                                false_start_text = buffer + delta_text
-                                json_data = {
-                                    "type": "contentBlockDelta",
-                                    "data": {
-                                        **contentBlockDelta,
-                                        "delta": {
-                                            **contentBlockDelta.get("delta", {}),
-                                            "text": false_start_text
-                                        }
-                                    }
-                                }
-                                send_to_gateway(connectionId, json_data)
-                                
-                                # Clear buffer
-                                buffer = ""
-                                break
+                            batcher.flush()
+                            sender.send({"type": "breakTokenType"})
+                            if capture_text and keep_break_tokens:
+                                captured_parts.append(BREAK_TOKEN)
                         else:
-                            # Exhausted delta while matching - continue buffering
-                            if match_length == len(delta_text):
-                                buffer += delta_text
-                                # Don't send anything, wait for next delta
+                            batcher.add(segment)
+                            if capture_text:
+                                captured_parts.append(segment)
                 
                 # Handle message start events
                 elif "messageStart" in event:
+                    batcher.flush()
                     json_data = {
                         "type": "messageStart",
                         "data": event["messageStart"]
                     }
-                    send_to_gateway(connectionId, json_data)
+                    sender.send(json_data)
                 
                 # Handle message completion events
                 elif "messageStop" in event:
                     # If there's buffered content at message end, send it as false start
-                    if buffer:
-                        logger.warning(f"Incomplete BREAK_TOKEN at message end: {buffer}")
-                        # Send buffered content as regular delta
-                        json_data = {
-                            "type": "contentBlockDelta",
-                            "data": {
-                                "delta": {
-                                    "text": buffer
-                                }
-                            }
-                        }
-                        send_to_gateway(connectionId, json_data)
-                        buffer = ""
+                    leftover = scanner.finish()
+                    if leftover:
+                        logger.warning("Incomplete BREAK_TOKEN at message end: %s", leftover)
+                        batcher.add(leftover)
+                        if capture_text:
+                            captured_parts.append(leftover)
                     
+                    batcher.flush()
                     json_data = {
                         "type": "messageStop",
                         "data": event["messageStop"]
                     }
-                    send_to_gateway(connectionId, json_data)
+                    sender.send(json_data)
                 
                 # Log any unhandled event types
                 elif "contentBlockStop" in event:
@@ -365,18 +362,25 @@ def parse_and_send_response(response, connectionId, classic=None, pure=None, inf
                     # skip
                     continue
                 else:
-                    logger.warning(f"Unhandled event type: {event}")
+                    logger.warning("Unhandled event type: %s", event)
             
-            logger.info(f"Processed {event_count} streaming events")
+            # Stream ended without messageStop
+            batcher.add(scanner.finish())
+            batcher.flush()
+            sender.wait()
+            logger.info("Processed %s streaming events", event_count)
             
     except Exception as e:
-        logger.error(f"Response parsing failed: {e}")
-        logger.debug(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Response parsing failed: %s", e)
+        # Let frames already queued go out before the caller reports the error
+        if sender is not None:
+            sender.drain()
         raise
     
     # Return captured text if requested
     if capture_text:
-        logger.info(f"Captured text length: {len(captured_text)}")
+        captured_text = "".join(captured_parts)
+        logger.info("Captured text length: %s", len(captured_text))
         return captured_text
     return None
 
@@ -384,59 +388,104 @@ def parse_and_send_response(response, connectionId, classic=None, pure=None, inf
 # Function to create a formatted conversation history for AI model input
 def create_history(chatHistory):
     """Create a formatted conversation history for AI model input"""
-    logger.info(f"Creating history from {len(chatHistory)} messages")
+    logger.info("Creating history from %s messages", len(chatHistory))
     
     try:
-        history = ""
-        for message in chatHistory:
-            role = message["role"]
-            content = message["content"][0]["text"]
-            history += f"{role}: {content}\n\n"
+        history = "".join(
+            f"{message['role']}: {message['content'][0]['text']}\n\n"
+            for message in chatHistory
+        )
         
         logger.info("Chat history formatted successfully")
         return history
         
     except KeyError as e:
-        logger.error(f"Invalid message format in chat history: {e}")
+        logger.error("Invalid message format in chat history: %s", e)
         raise
     except Exception as e:
-        logger.error(f"Failed to create history: {e}")
+        logger.error("Failed to create history: %s", e)
         raise
 
 
+# query text -> (expires_at, results), least recently used first.
+# Scoped to the warm container so repeated questions skip the retrieval call.
+_kb_cache = OrderedDict()
+
+
+def _kb_cache_key(question):
+    """Normalize case and whitespace so trivially different queries share an entry"""
+    return ' '.join(question.lower().split())
+
+
+# Same for every query, so built once per container
+_KB_RETRIEVAL_CONFIGURATION = {
+    'vectorSearchConfiguration': {
+        'numberOfResults': constants.NUM_KB_RESULTS,
+    }
+}
+
+
 # Function to execute a knowledge base query using Bedrock Agent Runtime
 def execute_knowledge_base_query(question):
+    cache_key = _kb_cache_key(question)
+    entry = _kb_cache.get(cache_key)
+    if entry is not None:
+        expires_at, kb_results = entry
+        if expires_at >= time.monotonic():
+            _kb_cache.move_to_end(cache_key)
+            logger.info("Knowledge base results served from cache")
+            return kb_results
+        del _kb_cache[cache_key]
+    
     try:
-        # Set up the knowledge base ID and retrieval configuration
+        # Set up the knowledge base ID and query
         knowledge_base_id = constants.KNOWLEDGE_BASE_ID
         query = {
             'text': question
         }
         
-        retrieval_configuration = {
-            'vectorSearchConfiguration': {
-                'numberOfResults': int(constants.NUM_KB_RESULTS),
-            }
-        }
-        
         # Retrieve from the Knowledge base
-        logger.info(f"Retrieving from knowledge base with query: {query['text']}")
+        logger.info("Retrieving from knowledge base with query: %s", query['text'])
         kb_results = agent.retrieve(
             knowledgeBaseId=knowledge_base_id, 
             retrievalQuery=query, 
-            retrievalConfiguration=retrieval_configuration
+            retrievalConfiguration=_KB_RETRIEVAL_CONFIGURATION
         )
         
         logger.info("Knowledge base retrieval successful")
+        
+        _kb_cache[cache_key] = (time.monotonic() + constants.KB_CACHE_TTL_SECONDS, kb_results)
+        if len(_kb_cache) > constants.KB_CACHE_MAX_ENTRIES:
+            _kb_cache.popitem(last=False)
         return kb_results
         
     except Exception as e:
-        logger.error(f"Knowledge base retrieval failed: {e}")
+        logger.error("Knowledge base retrieval failed: %s", e)
         raise
 
 
 
 
+def format_kb_results(kb_results):
+    """
+    Render a knowledge base retrieve() response as plain text for the prompt.
+    
+    Only the retrieved chunk text is kept; response metadata, scores and
+    S3 locations are dropped (the scraped documents already carry their
+    source URL in a header).
+    
+    Returns:
+        str: Numbered resource blocks separated by blank lines, or "" if
+        nothing was retrieved
+    """
+    blocks = []
+    for item in kb_results.get('retrievalResults', []):
+        text = item.get('content', {}).get('text', '').strip()
+        if text:
+            blocks.append(f"Resource {len(blocks) + 1}:\n{text}")
+    return '\n\n'.join(blocks)
+
+
 def format_results_for_response(question, result):
     """Format a single question-result pair for final response"""
     logger.info("Formatting results for final response")
@@ -446,7 +495,7 @@ def format_results_for_response(question, result):
         logger.info("Results formatted successfully")
         return final_response
     except Exception as e:
-        logger.error(f"Failed to format results: {e}")
+        logger.error("Failed to format results: %s", e)
         raise
 
 def extract_json_content(text):
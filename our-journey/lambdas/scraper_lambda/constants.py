@@ -99,6 +99,10 @@ PDF_TIMEOUT = 60   # seconds for PDF downloads
 PAGE_SCRAPE_DELAY = 2  # Between HTML page scrapes
 PDF_DOWNLOAD_DELAY = 1  # Between PDF downloads
 
+# Concurrent fetches against the site; each worker still waits the delay
+# above between its own requests
+SCRAPER_MAX_WORKERS = 3
+
 # ============================================================================
 # S3 CONFIGURATION CONSTANTS
 # ============================================================================
@@ -1,6 +1,5 @@
 import json
 import logging
-import traceback
 from utilities import (
     handle_create_request, handle_update_request, handle_delete_request,
     send_cfn_response, scrape_and_sync
@@ -109,8 +108,7 @@ def lambda_handler(event, context):
     except Exception as e:
         # Catch-all error handler
         error_msg = f"Unexpected error in Lambda handler: {str(e)}"
-        logger.error(error_msg)
-        logger.debug(f"Full traceback: {traceback.format_exc()}")
+        logger.exception(error_msg)
         
         # Only send CloudFormation response if this is a Custom Resource
         if event.get('RequestType'):
@@ -1,26 +1,60 @@
 import json
 import logging
-import traceback
 import time
 import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 import urllib3
 import boto3
+from botocore.config import Config
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 from constants import *
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Use the C-based lxml parser when it is packaged in the layer, otherwise
+# the stdlib html.parser (which the current layer relies on)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 # Initialize HTTP client for CloudFormation responses
 http = urllib3.PoolManager()
 
+# Shared session for scraping so requests to the site reuse connections
+http_session = requests.Session()
+http_session.headers.update(HTTP_HEADERS)
+_http_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+http_session.mount('https://', _http_adapter)
+http_session.mount('http://', _http_adapter)
+
+# Keep connections alive across the S3 uploads and ingestion polling
+BOTO_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={'max_attempts': 4, 'mode': 'adaptive'},
+    connect_timeout=3,
+    read_timeout=30
+)
+
 # Initialize AWS clients
-s3_client = boto3.client('s3', region_name=AWS_REGION)
-bedrock_agent_client = boto3.client('bedrock-agent', region_name=AWS_REGION)
+s3_client = boto3.client('s3', region_name=AWS_REGION, config=BOTO_CONFIG)
+bedrock_agent_client = boto3.client('bedrock-agent', region_name=AWS_REGION, config=BOTO_CONFIG)
+
+# The Knowledge Base's data source never changes, so it is looked up once
+# per container
+_data_source_id = None
 
 
 # ============================================================================
@@ -103,8 +137,7 @@ def handle_create_request(event, context):
         
     except Exception as e:
         error_msg = f"CREATE request failed: {str(e)}"
-        logger.error(error_msg)
-        logger.debug(f"Full traceback: {traceback.format_exc()}")
+        logger.exception(error_msg)
         
         # Send success anyway to prevent stack from hanging
         send_cfn_response(
@@ -240,8 +273,7 @@ def scrape_and_sync(event, context, is_custom_resource=False):
         
     except Exception as e:
         error_msg = f"Error in scrape and sync: {str(e)}"
-        logger.error(error_msg)
-        logger.debug(f"Full traceback: {traceback.format_exc()}")
+        logger.exception(error_msg)
         raise
 
 
@@ -303,33 +335,47 @@ def scrape_html_pages():
         int: Number of successfully scraped pages
     """
     logger.info(f"Scraping {len(SCRAPER_URLS)} HTML pages")
-    success_count = 0
     
-    for filename, url in SCRAPER_URLS.items():
-        try:
-            logger.info(f"Scraping: {url}")
-            
-            # Fetch HTML
-            response = requests.get(url, headers=HTTP_HEADERS, timeout=HTTP_TIMEOUT)
-            response.raise_for_status()
-            
-            # Extract content
-            text_content = extract_main_content(response.content, url, filename)
-            
-            # Upload to S3
-            upload_text_to_s3(filename, text_content)
-            
-            success_count += 1
-            logger.info(f"✓ Successfully scraped and uploaded: {filename}")
-            
-            # Be polite - wait between requests
-            time.sleep(PAGE_SCRAPE_DELAY)
-            
-        except Exception as e:
-            logger.error(f"✗ Failed to scrape {url}: {str(e)}")
-            # Continue with other pages
+    # Pages are independent, so a few are fetched at once
+    with ThreadPoolExecutor(max_workers=SCRAPER_MAX_WORKERS) as executor:
+        results = executor.map(scrape_html_page, SCRAPER_URLS.keys(), SCRAPER_URLS.values())
+        return sum(results)
+
+
+def scrape_html_page(filename, url):
+    """
+    Scrape a single HTML page and upload it to S3.
     
-    return success_count
+    Args:
+        filename: Name for the page
+        url: Page URL
+        
+    Returns:
+        bool: True if the page was scraped and uploaded
+    """
+    try:
+        logger.info(f"Scraping: {url}")
+        
+        # Fetch HTML
+        response = http_session.get(url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        
+        # Extract content
+        text_content = extract_main_content(response.content, url, filename)
+        
+        # Upload to S3
+        upload_text_to_s3(filename, text_content)
+        
+        logger.info(f"✓ Successfully scraped and uploaded: {filename}")
+        
+        # Be polite - wait between requests
+        time.sleep(PAGE_SCRAPE_DELAY)
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Failed to scrape {url}: {str(e)}")
+        # Continue with other pages
+        return False
 
 
 def extract_main_content(html_content, url, page_name):
@@ -344,7 +390,7 @@ def extract_main_content(html_content, url, page_name):
     Returns:
         str: Formatted text content with metadata header
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = BeautifulSoup(html_content, HTML_PARSER)
     
     # Remove unwanted elements
     for element in soup(['script', 'style', 'nav', 'header', 'footer']):
@@ -389,7 +435,7 @@ def discover_and_download_pdfs():
     
     try:
         # Fetch the page containing PDF links
-        response = requests.get(PDF_SOURCE_URL, headers=HTTP_HEADERS, timeout=HTTP_TIMEOUT)
+        response = http_session.get(PDF_SOURCE_URL, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
         # Discover PDF links
@@ -400,33 +446,52 @@ def discover_and_download_pdfs():
             logger.warning("No PDF links found")
             return 0
         
-        # Download each PDF
-        success_count = 0
-        for i, pdf_url in enumerate(pdf_links, 1):
-            try:
-                logger.info(f"[{i}/{len(pdf_links)}] Downloading PDF: {pdf_url}")
-                
-                success, filename, content = download_pdf(pdf_url)
-                
-                if success:
-                    upload_pdf_to_s3(filename, content)
-                    success_count += 1
-                    logger.info(f"✓ Downloaded and uploaded: {filename}")
-                
-                # Be polite - wait between downloads
-                time.sleep(PDF_DOWNLOAD_DELAY)
-                
-            except Exception as e:
-                logger.error(f"✗ Failed to download PDF {pdf_url}: {str(e)}")
-                # Continue with other PDFs
-        
-        return success_count
+        # Download the PDFs a few at a time
+        with ThreadPoolExecutor(max_workers=SCRAPER_MAX_WORKERS) as executor:
+            results = executor.map(
+                download_and_upload_pdf,
+                pdf_links,
+                range(1, len(pdf_links) + 1),
+                [len(pdf_links)] * len(pdf_links)
+            )
+            return sum(results)
         
     except Exception as e:
         logger.error(f"Error in PDF discovery/download: {str(e)}")
         return 0
 
 
+def download_and_upload_pdf(pdf_url, index, total):
+    """
+    Download a single PDF and upload it to S3.
+    
+    Args:
+        pdf_url: PDF URL to download
+        index: Position of this PDF, for progress logging
+        total: Number of PDFs being downloaded
+        
+    Returns:
+        bool: True if the PDF was downloaded and uploaded
+    """
+    try:
+        logger.info(f"[{index}/{total}] Downloading PDF: {pdf_url}")
+        
+        success, filename, content = download_pdf(pdf_url)
+        
+        if success:
+            upload_pdf_to_s3(filename, content)
+            logger.info(f"✓ Downloaded and uploaded: {filename}")
+        
+        # Be polite - wait between downloads
+        time.sleep(PDF_DOWNLOAD_DELAY)
+        return success
+        
+    except Exception as e:
+        logger.error(f"✗ Failed to download PDF {pdf_url}: {str(e)}")
+        # Continue with other PDFs
+        return False
+
+
 def discover_pdf_links(html_content, base_url):
     """
     Discover all PDF links on a page.
@@ -438,7 +503,8 @@ def discover_pdf_links(html_content, base_url):
     Returns:
         list: List of absolute PDF URLs
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # Only links are needed, so skip building the rest of the document
+    soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=SoupStrainer('a', href=True))
     
     pdf_links = []
     for link in soup.find_all('a', href=True):
@@ -476,7 +542,7 @@ def download_pdf(url):
         filename = create_filename_from_url(url)
         
         # Download PDF
-        response = requests.get(url, headers=HTTP_HEADERS, timeout=PDF_TIMEOUT, stream=True)
+        response = http_session.get(url, timeout=PDF_TIMEOUT, stream=True)
         response.raise_for_status()
         
         # Read content
@@ -569,8 +635,7 @@ def start_kb_ingestion():
         return True, job_id, data_source_id
         
     except Exception as e:
-        logger.error(f"Error starting ingestion job: {str(e)}")
-        logger.debug(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Error starting ingestion job: %s", e)
         return False, None, None
 
 
@@ -581,6 +646,10 @@ def get_data_source_id():
     Returns:
         str: Data source ID
     """
+    global _data_source_id
+    if _data_source_id is not None:
+        return _data_source_id
+    
     try:
         response = bedrock_agent_client.list_data_sources(
             knowledgeBaseId=KNOWLEDGE_BASE_ID
@@ -592,8 +661,8 @@ def get_data_source_id():
             raise ValueError(f"No data sources found for Knowledge Base: {KNOWLEDGE_BASE_ID}")
         
         # Return the first data source ID
-        data_source_id = data_sources[0]['dataSourceId']
-        return data_source_id
+        _data_source_id = data_sources[0]['dataSourceId']
+        return _data_source_id
         
     except Exception as e:
         logger.error(f"Error getting data source ID: {str(e)}")
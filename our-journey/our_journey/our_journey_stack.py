@@ -168,6 +168,19 @@ class OurJourneyStack(Stack):
             ),
         )
 
+        # GSI for querying by county
+        conversations_table.add_global_secondary_index(
+            index_name="CountyIndex",
+            partition_key=dynamodb.Attribute(
+                name="county",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="timestamp",
+                type=dynamodb.AttributeType.STRING
+            ),
+        )
+
         # Follow-Up Queue Table - stores conversations that need follow-up
         followup_table = dynamodb.Table(
             self,
@@ -224,6 +237,25 @@ class OurJourneyStack(Stack):
             ),
         )
 
+        # Response Cache Table - first-turn answers reused for the same
+        # question, partitioned by user segment and expired via TTL
+        response_cache_table = dynamodb.Table(
+            self,
+            "ResponseCacheTable",
+            partition_key=dynamodb.Attribute(
+                name="segment",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="questionHash",
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+            point_in_time_recovery=False,
+            time_to_live_attribute="ttl",
+        )
+
 
         # Create a WebSocket API
         web_socket_api = apigwv2.WebSocketApi(self, "web_socket_api",)
@@ -253,6 +285,7 @@ class OurJourneyStack(Stack):
                 "GUARDRAIL_VERSION": guardrail.guardrail_version,
                 "CONVERSATIONS_TABLE": conversations_table.table_name,
                 "FOLLOWUP_TABLE": followup_table.table_name,
+                "RESPONSE_CACHE_TABLE": response_cache_table.table_name,
             }
         )
 
@@ -498,6 +531,11 @@ class OurJourneyStack(Stack):
             description="DynamoDB table for follow-up queue"
         )
 
+        CfnOutput(self, "response-cache-table-name",
+            value = response_cache_table.table_name,
+            description="DynamoDB table for the response cache"
+        )
+
         CfnOutput(self, "admin-api-url",
             value = rest_api.url,
             description="REST API endpoint for admin operations"